@@ -0,0 +1,131 @@
+# broadcast.py
+"""
+Instructor broadcast: one published scenario, fanned out to every session.
+
+The instructor publishes a ``DEFAULT_SCENARIOS``-style parameter dict to a
+room. Outputs, baseline deltas and the comparison figure are computed once
+at publish time and stored in a small SQLite table (WAL mode, shared by all
+sessions and worker processes on the host). Student sessions poll
+``latest(room)``, which costs a one-row version lookup; the stored payload is
+decoded once per process per new version and shared between sessions.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from model_graph import BASELINE, INPUTS, compute_graph_outputs
+
+DB_PATH = os.environ.get("GFR_BROADCAST_DB", "broadcast.db")
+DEFAULT_ROOM = "class"
+METRICS = (("GFR", "mL/min"), ("RPF", "mL/min"), ("FF", "%"), ("Pgc", "mmHg"), ("NFP", "mmHg"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS broadcasts (
+    room      TEXT PRIMARY KEY,
+    version   INTEGER NOT NULL,
+    active    INTEGER NOT NULL,
+    name      TEXT,
+    published REAL,
+    payload   TEXT
+)
+"""
+
+
+@dataclass(frozen=True)
+class Broadcast:
+    room: str
+    version: int
+    name: str
+    published: float
+    params: dict
+    outputs: dict
+    baseline: dict
+    figure: dict
+
+
+# --- Storage ---
+@contextmanager
+def _connect(path: str):
+    """Short-lived connection: commit on success, always close."""
+    con = sqlite3.connect(path, timeout=5.0)
+    try:
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute(_SCHEMA)
+        with con:
+            yield con
+    finally:
+        con.close()
+
+
+def comparison_figure(name: str, outputs: dict, baseline: dict) -> dict:
+    """Grouped bar chart (Plotly JSON) of the broadcast scenario against baseline."""
+    labels = [f"{k} ({u})" for k, u in METRICS]
+    return {
+        "data": [
+            {"type": "bar", "name": "Baseline", "x": labels, "y": [baseline[k] for k, _ in METRICS]},
+            {"type": "bar", "name": name, "x": labels, "y": [outputs[k] for k, _ in METRICS]},
+        ],
+        "layout": {"barmode": "group", "height": 380, "margin": {"l": 40, "r": 10, "t": 30, "b": 40},
+                   "legend": {"orientation": "h", "y": 1.12}},
+    }
+
+
+def publish(name: str, params: dict, room: str = DEFAULT_ROOM, path: str = None) -> int:
+    """Compute ``params`` once and make it the live scenario of ``room``; returns the new version."""
+    params = {k: float(params[k]) for k in INPUTS}
+    outputs = compute_graph_outputs(params)
+    baseline = compute_graph_outputs(BASELINE)
+    payload = json.dumps({
+        "params": params,
+        "outputs": outputs,
+        "baseline": baseline,
+        "figure": comparison_figure(name, outputs, baseline),
+    })
+    with _connect(path or DB_PATH) as con:
+        row = con.execute("SELECT version FROM broadcasts WHERE room = ?", (room,)).fetchone()
+        version = (row[0] if row else 0) + 1
+        con.execute(
+            "INSERT OR REPLACE INTO broadcasts (room, version, active, name, published, payload) "
+            "VALUES (?, ?, 1, ?, ?, ?)",
+            (room, version, name, time.time(), payload),
+        )
+    return version
+
+
+def stop(room: str = DEFAULT_ROOM, path: str = None) -> None:
+    """End the broadcast; followers fall back to their own controls."""
+    with _connect(path or DB_PATH) as con:
+        con.execute("UPDATE broadcasts SET active = 0, version = version + 1 WHERE room = ?", (room,))
+
+
+# --- Subscribing ---
+_decoded = {}                 # (path, room) -> Broadcast, latest version seen by this process
+_decoded_lock = threading.Lock()
+
+def latest(room: str = DEFAULT_ROOM, path: str = None):
+    """The live ``Broadcast`` of ``room``, or None when nothing is being broadcast."""
+    path = path or DB_PATH
+    if not os.path.exists(path):
+        return None
+    with _connect(path) as con:
+        row = con.execute("SELECT version, active FROM broadcasts WHERE room = ?", (room,)).fetchone()
+        if not row or not row[1]:
+            return None
+        key = (path, room)
+        cached = _decoded.get(key)
+        if cached is not None and cached.version == row[0]:
+            return cached
+        full = con.execute(
+            "SELECT version, name, published, payload FROM broadcasts WHERE room = ? AND active = 1", (room,)
+        ).fetchone()
+    if not full:
+        return None
+    data = json.loads(full[3])
+    b = Broadcast(room, full[0], full[1], full[2], data["params"], data["outputs"], data["baseline"], data["figure"])
+    with _decoded_lock:
+        _decoded[key] = b
+    return b
@@ -0,0 +1,206 @@
+# egfr.py
+"""
+Estimated GFR equations and CKD staging, vectorized over NumPy/pandas arrays.
+
+All equations take serum creatinine in mg/dL (use ``scr_from_umol`` for
+µmol/L) and return NaN where an input is missing or non-positive, including
+an unknown sex. Large lab files are processed in chunks with ``stream_egfr``
+so memory stays flat no matter how many rows the file has.
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CKD_STAGES = np.array(["G1", "G2", "G3a", "G3b", "G4", "G5"])
+# Lower eGFR bounds (mL/min/1.73 m²) of G5, G4, G3b, G3a, G2
+_STAGE_EDGES = np.array([15.0, 30.0, 45.0, 60.0, 90.0])
+
+
+# --- Input helpers ---
+def scr_from_umol(scr_umol):
+    """Creatinine µmol/L → mg/dL."""
+    return np.asarray(scr_umol, dtype=float) / 88.4
+
+def is_female(sex) -> np.ndarray:
+    """
+    1.0 / 0.0 from sex codes such as 'F', 'female', 'M', 'male' (case-insensitive);
+    NaN where the code is missing, blank or unrecognised.
+    """
+    s = pd.Series(np.asarray(sex, dtype=object).ravel())
+    code = s.where(s.notna(), "").astype(str).str.strip().str.lower()
+    out = np.where(code.str.startswith("f"), 1.0, np.where(code.str.startswith("m"), 0.0, np.nan))
+    return out.reshape(np.shape(sex))
+
+def _sex(female):
+    """``(female, known)``: boolean female flag and a 1.0/NaN factor that blanks unknown sex."""
+    f = np.asarray(female, dtype=float)
+    return f > 0.5, np.where(np.isnan(f), np.nan, 1.0)
+
+def _positive(x) -> np.ndarray:
+    x = np.asarray(x, dtype=float)
+    return np.where(x > 0, x, np.nan)
+
+
+# --- Equations ---
+def ckd_epi_2021_cr(scr, age, female) -> np.ndarray:
+    """CKD-EPI 2021 creatinine equation (race-free), mL/min/1.73 m²."""
+    scr, age = _positive(scr), _positive(age)
+    female, known = _sex(female)
+    kappa = np.where(female, 0.7, 0.9)
+    alpha = np.where(female, -0.241, -0.302)
+    ratio = scr / kappa
+    return (142.0
+            * np.minimum(ratio, 1.0) ** alpha
+            * np.maximum(ratio, 1.0) ** -1.200
+            * 0.9938 ** age
+            * np.where(female, 1.012, 1.0)
+            * known)
+
+def ckd_epi_2021_cr_cys(scr, scys, age, female) -> np.ndarray:
+    """CKD-EPI 2021 creatinine–cystatin C equation (race-free), mL/min/1.73 m²."""
+    scr, scys, age = _positive(scr), _positive(scys), _positive(age)
+    female, known = _sex(female)
+    kappa = np.where(female, 0.7, 0.9)
+    alpha = np.where(female, -0.219, -0.144)
+    ratio = scr / kappa
+    cys = scys / 0.8
+    return (135.0
+            * np.minimum(ratio, 1.0) ** alpha
+            * np.maximum(ratio, 1.0) ** -0.544
+            * np.minimum(cys, 1.0) ** -0.323
+            * np.maximum(cys, 1.0) ** -0.778
+            * 0.9961 ** age
+            * np.where(female, 0.963, 1.0)
+            * known)
+
+def mdrd(scr, age, female, black=False) -> np.ndarray:
+    """IDMS-traceable 4-variable MDRD equation, mL/min/1.73 m²."""
+    scr, age = _positive(scr), _positive(age)
+    female, known = _sex(female)
+    return (175.0
+            * scr ** -1.154
+            * age ** -0.203
+            * np.where(female, 0.742, 1.0)
+            * np.where(np.asarray(black, dtype=bool), 1.212, 1.0)
+            * known)
+
+def cockcroft_gault(scr, age, weight, female) -> np.ndarray:
+    """Cockcroft–Gault creatinine clearance, mL/min (not indexed to BSA)."""
+    scr, age, weight = _positive(scr), _positive(age), _positive(weight)
+    female, known = _sex(female)
+    crcl = (140.0 - age) * weight / (72.0 * scr)
+    return np.maximum(crcl, 0.0) * np.where(female, 0.85, 1.0) * known
+
+def ckd_stage(egfr) -> np.ndarray:
+    """KDIGO G-stage labels ('G1'…'G5'); empty string where eGFR is missing."""
+    egfr = np.asarray(egfr, dtype=float)
+    idx = len(_STAGE_EDGES) - np.searchsorted(_STAGE_EDGES, egfr, side="right")
+    labels = CKD_STAGES[np.clip(idx, 0, len(CKD_STAGES) - 1)]
+    return np.where(np.isnan(egfr), "", labels)
+
+
+# --- DataFrame / streaming ingestion ---
+DEFAULT_COLUMNS = {
+    "creatinine": "creatinine",   # mg/dL
+    "cystatin_c": "cystatin_c",   # mg/L
+    "age": "age",                 # years
+    "sex": "sex",
+    "weight": "weight",           # kg
+}
+
+EQUATIONS = ("ckd_epi_2021_cr", "ckd_epi_2021_cr_cys", "mdrd", "cockcroft_gault")
+
+
+def add_egfr_columns(df: pd.DataFrame, columns: dict = None, equations=("ckd_epi_2021_cr",),
+                     creatinine_units: str = "mg/dL", stage_from: str = None) -> pd.DataFrame:
+    """
+    Return ``df`` with one ``egfr_<equation>`` column per equation plus a
+    ``ckd_stage`` column (staged on ``stage_from``, default the first equation).
+    """
+    cols = {**DEFAULT_COLUMNS, **(columns or {})}
+    scr = df[cols["creatinine"]].to_numpy(dtype=float)
+    if creatinine_units.lower() in ("umol/l", "µmol/l"):
+        scr = scr_from_umol(scr)
+    age = df[cols["age"]].to_numpy(dtype=float)
+    female = is_female(df[cols["sex"]].to_numpy())
+
+    out = df.copy()
+    for eq in equations:
+        if eq == "ckd_epi_2021_cr":
+            val = ckd_epi_2021_cr(scr, age, female)
+        elif eq == "ckd_epi_2021_cr_cys":
+            val = ckd_epi_2021_cr_cys(scr, df[cols["cystatin_c"]].to_numpy(dtype=float), age, female)
+        elif eq == "mdrd":
+            val = mdrd(scr, age, female)
+        elif eq == "cockcroft_gault":
+            val = cockcroft_gault(scr, age, df[cols["weight"]].to_numpy(dtype=float), female)
+        else:
+            raise ValueError(f"Unknown eGFR equation: {eq} (choose from {', '.join(EQUATIONS)})")
+        out[f"egfr_{eq}"] = val
+    out["ckd_stage"] = ckd_stage(out[f"egfr_{stage_from or equations[0]}"].to_numpy())
+    return out
+
+
+def _arrow_chunk(df: pd.DataFrame, cols: dict, equations, schema=None):
+    """
+    ``df`` as an Arrow table whose column types don't depend on the chunk:
+    eGFR inputs and results are float64, sex and stage strings, and a column
+    that is entirely missing takes the file's type (string if still unknown).
+    """
+    import pyarrow as pa
+    fixed = {cols[k]: pa.float64() for k in ("creatinine", "cystatin_c", "age", "weight")}
+    fixed.update({f"egfr_{eq}": pa.float64() for eq in equations})
+    fixed.update({cols["sex"]: pa.string(), "ckd_stage": pa.string()})
+    arrays = []
+    for name in df.columns:
+        col = df[name]
+        target = schema.field(name).type if schema is not None else fixed.get(name)
+        if col.isna().all():
+            arrays.append(pa.nulls(len(col), target or pa.string()))
+        else:
+            arr = pa.array(col, from_pandas=True)
+            arrays.append(arr.cast(target) if target is not None else arr)
+    return pa.Table.from_arrays(arrays, names=[str(c) for c in df.columns])
+
+
+def _read_chunks(path: Path, chunksize: int, usecols=None):
+    if path.suffix.lower() in (".parquet", ".pq"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Reading Parquet lab files needs pyarrow (pip install pyarrow).") from e
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=usecols):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=usecols)
+
+
+def stream_egfr(path, out_path=None, columns: dict = None, equations=("ckd_epi_2021_cr",),
+                creatinine_units: str = "mg/dL", chunksize: int = 500_000, keep_columns=None):
+    """
+    Compute eGFR and CKD stage for a CSV/Parquet lab file chunk by chunk.
+
+    Yields each processed chunk. If ``out_path`` is given, chunks are also
+    appended to it (CSV, or Parquet when the suffix is .parquet). Use
+    ``keep_columns`` to read only the columns you need from wide files.
+    """
+    path, writer = Path(path), None
+    cols = {**DEFAULT_COLUMNS, **(columns or {})}
+    out_path = Path(out_path) if out_path is not None else None
+    try:
+        for i, chunk in enumerate(_read_chunks(path, chunksize, keep_columns)):
+            result = add_egfr_columns(chunk, columns, equations, creatinine_units)
+            if out_path is not None:
+                if out_path.suffix.lower() in (".parquet", ".pq"):
+                    import pyarrow.parquet as pq
+                    table = _arrow_chunk(result, cols, equations, writer.schema if writer else None)
+                    if writer is None:
+                        writer = pq.ParquetWriter(out_path, table.schema)
+                    writer.write_table(table)
+                else:
+                    result.to_csv(out_path, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+            yield result
+    finally:
+        if writer is not None:
+            writer.close()
@@ -0,0 +1,355 @@
+# export_static.py
+"""
+Pre-render every page in ``utils_nav.PAGES`` at its default state into a
+static HTML bundle that any plain web server can host.
+
+    python export_static.py --out dist
+
+Each page is executed headlessly with Streamlit's ``AppTest`` runner and its
+element tree is turned into HTML: markdown/LaTeX are rendered in the browser
+(marked + KaTeX), Plotly figures are embedded as JSON for plotly.js,
+Vega-Lite charts get their data inlined, and tables become HTML tables.
+Widgets are shown at their default values with a link to the live app.
+
+The bundle is self-contained: plotly.js comes from the installed package,
+the other libraries (and KaTeX's fonts) are downloaded from jsdelivr at build
+time, and files the pages reference under ``app/static/`` (e.g. cached video
+thumbnails) are copied in. If the build machine is offline, or with ``--cdn``,
+those libraries are linked from jsdelivr instead and the bundle needs it at
+view time (``manifest.json`` lists them under ``cdn``).
+
+Shared CSS/JS/font files are fingerprinted (``app.<hash>.css``) and listed in
+``manifest.json``; serve them with a long ``Cache-Control: immutable`` and
+the ``*.html`` pages with ``no-cache``.
+
+Pages are rendered through ``AppTest``'s public element API (``AppTest.main``),
+tested with Streamlit 1.66.
+"""
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+import sys
+from pathlib import Path
+from urllib.error import URLError
+from urllib.request import urlopen
+
+ROOT = Path(__file__).resolve().parent
+APP_URL = "https://glomerular-filtration-rate-n34kxzj2bd7uruszragr3d.streamlit.app/"  # same as gfr_app.APP_URL
+
+CDN_SCRIPTS = [
+    "https://cdn.jsdelivr.net/npm/marked@12/marked.min.js",
+    "https://cdn.jsdelivr.net/npm/katex@0.16/dist/katex.min.js",
+    "https://cdn.jsdelivr.net/npm/vega@5/build/vega.min.js",
+    "https://cdn.jsdelivr.net/npm/vega-lite@5/build/vega-lite.min.js",
+    "https://cdn.jsdelivr.net/npm/vega-embed@6/build/vega-embed.min.js",
+]
+CDN_STYLES = ["https://cdn.jsdelivr.net/npm/katex@0.16/dist/katex.min.css"]
+
+WIDGETS = {
+    "slider", "select_slider", "selectbox", "multiselect", "number_input", "radio",
+    "toggle", "checkbox", "text_input", "text_area", "date_input", "time_input",
+    "color_picker", "file_uploader",
+}
+ALERTS = {"info", "success", "warning", "error"}
+SKIP = {"sidebar", "event", "spinner", "progress", "empty"}
+
+
+# --- Assets ---
+APP_CSS = """
+body{margin:0;font-family:system-ui,-apple-system,"Segoe UI",Roboto,sans-serif;color:#111;background:#fff}
+.layout{display:flex;min-height:100vh}
+nav{width:240px;flex:none;background:#f7f9fc;padding:1rem;box-sizing:border-box}
+nav a{display:block;padding:.45rem .6rem;margin:.2rem 0;border-radius:8px;color:#111;text-decoration:none;border:1px solid #e3e7ee;background:#fff}
+nav a.active{border-color:#1a73e8;color:#1a73e8}
+main{flex:1;max-width:1200px;padding:1.5rem 2.5rem;box-sizing:border-box}
+.row{display:flex;gap:1rem;flex-wrap:wrap}.row>.col{min-width:0}
+.metric{padding:.3rem 0}.metric .label{font-size:.85rem;color:#555}.metric .value{font-size:1.8rem}
+.metric .delta{font-size:.85rem;color:#188038}.metric .delta.neg{color:#d93025}
+.caption{font-size:.85rem;color:#666}
+.alert{padding:.8rem 1rem;border-radius:8px;margin:.5rem 0}
+.alert.info{background:#e8f0fe}.alert.success{background:#e6f4ea}.alert.warning{background:#fef7e0}.alert.error{background:#fce8e6}
+.widget{border:1px dashed #c9d2e0;border-radius:8px;padding:.4rem .7rem;margin:.3rem 0;font-size:.9rem}
+.widget .val{font-weight:600;margin-left:.4rem}
+.btn{display:block;text-align:center;padding:.45rem;border:1px solid #d0d7e2;border-radius:8px;color:#111;text-decoration:none;margin:.3rem 0}
+details{border:1px solid #e3e7ee;border-radius:8px;padding:.5rem 1rem;margin:.5rem 0}
+.tab>h4{border-bottom:2px solid #1a73e8;display:inline-block;margin-bottom:.5rem}
+table.table{border-collapse:collapse;font-size:.85rem;width:100%;overflow-x:auto;display:block}
+table.table th,table.table td{border-bottom:1px solid #e3e7ee;padding:.3rem .5rem;text-align:right}
+.plotly,.vega{width:100%;min-height:360px}
+.live{font-size:.85rem;color:#1a73e8}
+"""
+
+APP_JS = """
+document.addEventListener("DOMContentLoaded", function () {
+  document.querySelectorAll(".md").forEach(function (el) {
+    el.innerHTML = window.marked ? marked.parse(el.textContent) : el.innerHTML;
+  });
+  document.querySelectorAll(".latex").forEach(function (el) {
+    if (window.katex) katex.render(el.textContent, el, {displayMode: true, throwOnError: false});
+  });
+  document.querySelectorAll(".plotly").forEach(function (el) {
+    var spec = JSON.parse(document.getElementById(el.id + "-spec").textContent);
+    Plotly.newPlot(el, spec.data, spec.layout || {}, {responsive: true, displaylogo: false});
+  });
+  document.querySelectorAll(".vega").forEach(function (el) {
+    var spec = JSON.parse(document.getElementById(el.id + "-spec").textContent);
+    if (window.vegaEmbed) vegaEmbed(el, spec, {actions: false});
+  });
+});
+"""
+
+
+def _fingerprinted(out: Path, name: str, data: bytes) -> str:
+    stem, ext = name.rsplit(".", 1)
+    fname = f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}.{ext}"
+    (out / fname).write_bytes(data)
+    return fname
+
+
+def _plotly_js() -> bytes:
+    from plotly.offline import get_plotlyjs
+    return get_plotlyjs().encode("utf-8")
+
+
+def _fetch(url: str, timeout: float = 30) -> bytes:
+    with urlopen(url, timeout=timeout) as r:
+        return r.read()
+
+
+def _vendor(out: Path, url: str, fetch=_fetch) -> str:
+    """Download a CDN file into the bundle (CSS with its ``url(...)`` fonts); returns the local name."""
+    name = url.rsplit("/", 1)[1]
+    data = fetch(url)
+    if name.endswith(".css"):
+        base = url.rsplit("/", 1)[0]
+        css = data.decode("utf-8")
+        for ref in sorted(set(re.findall(r"url\((?!data:)['\"]?([^'\")]+)['\"]?\)", css))):
+            local = _fingerprinted(out, ref.rsplit("/", 1)[-1], fetch(f"{base}/{ref}"))
+            css = re.sub(r"url\((['\"]?)" + re.escape(ref) + r"\1\)", f"url({local})", css)
+        data = css.encode("utf-8")
+    return _fingerprinted(out, name, data)
+
+
+_STATIC_REF = re.compile(r"app/static/([^\s\"'<>),&]+)")
+
+def _copy_static(out: Path, body: str) -> str:
+    """Copy the ``app/static/`` files a page references into the bundle and point at the copies."""
+    def local(m):
+        src = ROOT / "static" / m.group(1)
+        if not src.is_file():
+            return m.group(0)
+        dest = out / "static" / m.group(1)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(src, dest)
+        return f"static/{m.group(1)}"
+    return _STATIC_REF.sub(local, body)
+
+
+# --- Page naming ---
+def page_slug(label: str, path: str) -> str:
+    if path == "gfr_app.py":
+        return "index"
+    return re.sub(r"[^a-z0-9]+", "-", label.lower()).strip("-") or Path(path).stem
+
+def live_url(path: str, app_url: str) -> str:
+    """URL of the same page on the Streamlit deployment (Streamlit's url_path rules)."""
+    if path == "gfr_app.py":
+        return app_url
+    stem = re.sub(r"^\d+_", "", Path(path).stem)
+    return app_url.rstrip("/") + "/" + re.sub(r"[^A-Za-z0-9_-]", "", stem).strip("_")
+
+
+# --- Element tree → HTML ---
+def _json_script(el_id: str, obj) -> str:
+    text = obj if isinstance(obj, str) else json.dumps(obj, default=str)
+    text = text.replace("</", "<\\/")
+    return f'<script type="application/json" id="{el_id}">{text}</script>'
+
+def _table_html(df, index: bool) -> str:
+    return df.to_html(classes="table", index=index, border=0, na_rep="",
+                      float_format=lambda x: f"{x:,.2f}")
+
+def _vega_spec(proto) -> dict:
+    import pyarrow as pa
+    spec = json.loads(proto.spec)
+    if proto.datasets:
+        spec["datasets"] = {ds.name: pa.ipc.open_stream(ds.data.data).read_pandas().to_dict("records")
+                            for ds in proto.datasets}
+    elif proto.HasField("data") and proto.data.data:
+        spec["data"] = {"values": pa.ipc.open_stream(proto.data.data).read_pandas().to_dict("records")}
+    return spec
+
+
+class _Renderer:
+    def __init__(self, live: str):
+        self.live = live
+        self.n_figs = 0
+
+    def _next_id(self, kind: str) -> str:
+        self.n_figs += 1
+        return f"{kind}-{self.n_figs}"
+
+    def children(self, node) -> str:
+        return "".join(self.render(c) for c in getattr(node, "children", {}).values())
+
+    def render(self, node) -> str:
+        t = getattr(node, "type", None)
+        esc = html.escape
+        if t in SKIP:
+            return ""
+        if t in ("root", "main", None):
+            return self.children(node)
+        if t == "flex_container":
+            kids = list(getattr(node, "children", {}).values())
+            is_row = bool(kids) and all(getattr(k, "type", None) == "column" for k in kids)
+            return f'<div class="{"row" if is_row else "stack"}">{self.children(node)}</div>'
+        if t == "column":
+            return f'<div class="col" style="flex:{getattr(node.proto, "weight", 1) or 1:.4f}">{self.children(node)}</div>'
+        if t == "expander":
+            opened = " open" if node.proto.expanded else ""
+            return f"<details{opened}><summary>{esc(node.label)}</summary>{self.children(node)}</details>"
+        if t == "tab_container":
+            return f'<div class="tabs">{self.children(node)}</div>'
+        if t == "tab":
+            return f'<section class="tab"><h4>{esc(node.label)}</h4>{self.children(node)}</section>'
+        if t in ("title", "header", "subheader"):
+            level = {"title": 1, "header": 2, "subheader": 3}[t]
+            return f"<h{level}>{esc(node.value)}</h{level}>"
+        if t == "markdown":
+            return f'<div class="md">{esc(node.value)}</div>'
+        if t == "caption":
+            return f'<div class="md caption">{esc(node.value)}</div>'
+        if t == "divider":
+            return "<hr/>"
+        if t == "latex":
+            return f'<div class="latex">{esc(node.value.strip().strip("$").strip())}</div>'
+        if t in ALERTS:
+            return f'<div class="alert {t} md">{esc(node.value)}</div>'
+        if t == "metric":
+            delta = node.delta or ""
+            neg = " neg" if delta.startswith("-") else ""
+            delta_html = f'<div class="delta{neg}">{esc(delta)}</div>' if delta else ""
+            return (f'<div class="metric"><div class="label">{esc(node.label)}</div>'
+                    f'<div class="value">{esc(node.value)}</div>{delta_html}</div>')
+        if t == "plotly_chart":
+            fid = self._next_id("fig")
+            return f'<div class="plotly" id="{fid}"></div>{_json_script(fid + "-spec", node.proto.spec)}'
+        if t == "vega_lite_chart":
+            fid = self._next_id("vega")
+            return f'<div class="vega" id="{fid}"></div>{_json_script(fid + "-spec", _vega_spec(node.proto))}'
+        if t == "dataframe":
+            return _table_html(node.value, index=False)
+        if t == "table":
+            return _table_html(node.value, index=True)
+        if t in ("button", "download_button"):
+            return f'<a class="btn" href="{esc(self.live)}">{esc(node.proto.label)} ↗</a>'
+        if t in WIDGETS:
+            value = getattr(node, "value", "")
+            if isinstance(value, (list, tuple)):
+                value = " – ".join(map(str, value)) if t in ("slider", "select_slider") else ", ".join(map(str, value))
+            label = getattr(node, "label", "") or getattr(node.proto, "label", "")
+            return (f'<div class="widget"><span class="label">{esc(str(label))}</span>'
+                    f'<span class="val">{esc(str(value if value is not None else ""))}</span></div>')
+        if t == "code":
+            return f"<pre><code>{esc(node.value)}</code></pre>"
+        return f"<!-- not exported: {esc(str(t))} -->" + self.children(node)
+
+
+def render_page(path: str, live: str, timeout: float = 120) -> str:
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(str(ROOT / path), default_timeout=timeout).run()
+    if at.exception:
+        raise RuntimeError(f"{path} raised: {at.exception[0].value}")
+    return _Renderer(live).render(at.main)
+
+
+# --- Bundle ---
+def _page_html(title: str, body: str, nav: str, live: str, styles: list, scripts: list) -> str:
+    links = "".join(f'<link rel="stylesheet" href="{s}">' for s in styles)
+    tags = "".join(f'<script src="{s}" defer></script>' for s in scripts)
+    return f"""<!doctype html>
+<html lang="en"><head><meta charset="utf-8"><meta name="viewport" content="width=device-width,initial-scale=1">
+<title>{html.escape(title)} — GFR Simulator</title>{links}{tags}</head>
+<body><div class="layout"><nav><h3>🧭 Navigation</h3>{nav}
+<p class="live"><a href="{html.escape(live)}">Open the interactive version ↗</a></p></nav>
+<main>{body}</main></div></body></html>
+"""
+
+
+def _clear_output(out: Path) -> None:
+    """Remove a previous export; refuse anything that could be the repository or unrelated files."""
+    out = Path(out).resolve()
+    if out == ROOT or out in ROOT.parents:
+        raise ValueError(f"Refusing to export into {out}: it contains the app itself.")
+    if not out.exists():
+        return
+    if not out.is_dir() or (any(out.iterdir()) and not (out / "manifest.json").exists()):
+        raise ValueError(f"Refusing to replace {out}: it is not empty and holds no previous export (manifest.json).")
+    shutil.rmtree(out)
+
+
+def build(out: Path, app_url: str = APP_URL, only=None, vendor: bool = True) -> dict:
+    from utils_nav import PAGES
+
+    _clear_output(out)
+    out.mkdir(parents=True)
+
+    assets = {
+        "app.css": _fingerprinted(out, "app.css", APP_CSS.encode("utf-8")),
+        "app.js": _fingerprinted(out, "app.js", APP_JS.encode("utf-8")),
+        "plotly.js": _fingerprinted(out, "plotly.js", _plotly_js()),
+    }
+    cdn, local = [], {}
+    for url in CDN_STYLES + CDN_SCRIPTS:
+        if vendor:
+            try:
+                local[url] = assets[url.rsplit("/", 1)[1]] = _vendor(out, url)
+                continue
+            except (URLError, OSError) as e:
+                print(f"  (could not bundle {url}, linking the CDN: {getattr(e, 'reason', e)})")
+        cdn.append(url)
+    styles = [local.get(u, u) for u in CDN_STYLES] + [assets["app.css"]]
+    scripts = [local.get(u, u) for u in CDN_SCRIPTS] + [assets["plotly.js"], assets["app.js"]]
+
+    pages = [(label, path, page_slug(label, path)) for label, path in PAGES if (ROOT / path).exists()]
+    manifest = {"assets": assets, "cdn": cdn, "pages": {}}
+    for label, path, slug in pages:
+        if only and slug not in only:
+            continue
+        live = live_url(path, app_url)
+        nav = "".join(
+            f'<a href="{s}.html"{" class=active" if s == slug else ""}>{html.escape(lbl)}</a>'
+            for lbl, _, s in pages
+        )
+        body = _copy_static(out, render_page(path, live))
+        fname = f"{slug}.html"
+        (out / fname).write_text(_page_html(label, body, nav, live, styles, scripts), encoding="utf-8")
+        manifest["pages"][label] = {"file": fname, "source": path, "live": live}
+        print(f"  {label:<24} → {fname}")
+
+    (out / "manifest.json").write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    return manifest
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Pre-render the GFR app into a static HTML bundle.")
+    ap.add_argument("--out", default="dist", help="output directory (replaced on each build)")
+    ap.add_argument("--app-url", default=APP_URL, help="live Streamlit app used for interactive links")
+    ap.add_argument("--page", action="append", help="only export these page slugs (repeatable)")
+    ap.add_argument("--cdn", action="store_true", help="link marked/KaTeX/Vega from jsdelivr instead of bundling them")
+    args = ap.parse_args(argv)
+    out = Path(args.out).resolve()
+
+    # Pages read assets/ relative to the repo root, exactly like `streamlit run`.
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT))
+    print(f"Exporting static bundle to {args.out}/")
+    build(out, args.app_url, args.page, vendor=not args.cdn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+# jobs.py
+"""
+Background job runner for heavy, row-parallel computations (sweeps,
+virtual-patient populations, sensitivity runs).
+
+Inputs and outputs live in ``multiprocessing.shared_memory`` blocks, so the
+worker processes read and write the same arrays without pickling them. A job
+is split into row chunks; each finished chunk ticks its own progress slot and
+every chunk checks a shared cancel flag before it starts.
+
+Kernels must be importable top-level functions of the form
+``kernel(inputs: dict[str, ndarray], **params) -> dict[str, ndarray]``
+that work on any row slice.
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+PENDING, RUNNING, DONE, FAILED, CANCELLED = "pending", "running", "done", "failed", "cancelled"
+
+
+# --- Shared-memory helpers ---
+@dataclass(frozen=True)
+class _ArraySpec:
+    """Picklable handle to an array stored in a shared-memory block."""
+    shm_name: str
+    shape: tuple
+    dtype: str
+
+
+def _create(shape, dtype) -> tuple:
+    dtype = np.dtype(dtype)
+    size = max(1, int(np.prod(shape)) * dtype.itemsize)
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    arr = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    return shm, arr, _ArraySpec(shm.name, tuple(shape), dtype.str)
+
+
+def _attach(spec: _ArraySpec) -> tuple:
+    """Attach to an existing block from a worker without taking ownership of it."""
+    if sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(name=spec.shm_name, track=False)
+    else:
+        # Spawned workers share the parent's resource tracker, so registering
+        # the same name again is a no-op and the parent's unlink clears it.
+        shm = shared_memory.SharedMemory(name=spec.shm_name)
+    return shm, np.ndarray(spec.shape, dtype=np.dtype(spec.dtype), buffer=shm.buf)
+
+
+def _run_chunk(kernel, in_specs: dict, out_specs: dict, flag_spec, progress_spec,
+               chunk: int, start: int, stop: int, params: dict) -> bool:
+    """Worker entry point: compute rows [start, stop) unless the job was cancelled."""
+    handles = []
+    try:
+        shm, flag = _attach(flag_spec)
+        handles.append(shm)
+        if flag[0]:
+            return False
+        inputs = {}
+        for name, spec in in_specs.items():
+            shm, arr = _attach(spec)
+            handles.append(shm)
+            inputs[name] = arr[start:stop]
+        result = kernel(inputs, **params)
+        for name, spec in out_specs.items():
+            shm, arr = _attach(spec)
+            handles.append(shm)
+            arr[start:stop] = result[name]
+        shm, progress = _attach(progress_spec)
+        handles.append(shm)
+        progress[chunk] = 1
+        return True
+    finally:
+        # Drop array views before closing the mappings.
+        inputs = result = arr = flag = progress = None
+        for shm in handles:
+            shm.close()
+
+
+def params_hash(kernel, params: dict, inputs: dict = None) -> str:
+    """Stable cache key for a kernel, its parameters and (optionally) its input arrays."""
+    h = hashlib.sha256()
+    h.update(f"{kernel.__module__}.{kernel.__qualname__}".encode())
+    h.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+    for name in sorted(inputs or {}):
+        arr = np.ascontiguousarray(inputs[name])
+        h.update(f"{name}:{arr.dtype.str}:{arr.shape}".encode())
+        h.update(arr.tobytes())
+    return h.hexdigest()
+
+
+# --- Jobs ---
+@dataclass
+class JobStatus:
+    job_id: str
+    state: str
+    progress: float
+    error: str = ""
+
+
+@dataclass
+class _Job:
+    job_id: str
+    key: str
+    n_chunks: int
+    blocks: list = field(default_factory=list)
+    outputs: dict = field(default_factory=dict)
+    flag: np.ndarray = None
+    progress: np.ndarray = None
+    futures: list = field(default_factory=list)
+    finished: int = 0                      # chunks whose future has completed (any outcome)
+    state: str = PENDING
+    error: str = ""
+    result: dict = None
+    ended: float = None                    # time.monotonic() when the job left PENDING/RUNNING
+
+    def end(self, state: str, error: str = ""):
+        self.state, self.error, self.ended = state, error, time.monotonic()
+
+    def release(self):
+        self.outputs, self.flag, self.progress = {}, None, None
+        for shm in self.blocks:
+            shm.close()
+            shm.unlink()
+        self.blocks = []
+
+
+class JobRunner:
+    """
+    Process pool plus bookkeeping for shared-memory jobs.
+
+    Finished results are cached by parameter hash (LRU, bounded by entry
+    count and total ``nbytes``), so resubmitting the same job returns
+    immediately. Submitting to a ``slot`` (e.g. one per session and page)
+    cancels and forgets whatever job previously occupied that slot; finished
+    jobs outside any slot are forgotten ``job_ttl`` seconds after they end.
+    """
+
+    def __init__(self, max_workers: int = None, cache_size: int = 32,
+                 cache_bytes: int = 1 << 30, job_ttl: float = 600.0):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = None
+        self._lock = threading.RLock()
+        self._jobs = {}
+        self._slots = {}
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._cache_bytes = cache_bytes
+        self._cache_nbytes = 0
+        self._job_ttl = job_ttl
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # "spawn" avoids forking the (multi-threaded) Streamlit server.
+            self._pool = ProcessPoolExecutor(self.max_workers, mp_context=get_context("spawn"))
+        return self._pool
+
+    # ---- submission ----
+    def submit(self, kernel, inputs: dict, outputs: dict, params: dict = None,
+               chunk_size: int = 65536, slot: str = None, key: str = None) -> str:
+        """
+        Queue ``kernel`` over the rows of ``inputs``.
+
+        ``inputs`` maps names to equal-length 1-D (or row-major N-D) arrays;
+        ``outputs`` maps output names to ``(shape, dtype)`` or just a dtype, in
+        which case the output has one value per input row. Returns a job id.
+        """
+        params = dict(params or {})
+        inputs = {k: np.asarray(v) for k, v in inputs.items()}
+        n_rows = len(next(iter(inputs.values()))) if inputs else 0
+        if any(len(v) != n_rows for v in inputs.values()):
+            raise ValueError("All input arrays must have the same number of rows.")
+        key = key or params_hash(kernel, params, inputs)
+        job = _Job(uuid.uuid4().hex, key, max(1, -(-n_rows // chunk_size)))
+
+        with self._lock:
+            self._prune()
+            if slot is not None:
+                old = self._jobs.get(self._slots.get(slot))
+                if old is not None and old.key == key and old.state in (PENDING, RUNNING, DONE):
+                    # Same work already queued or finished in this slot (e.g. a polling rerun).
+                    return old.job_id
+                if old is not None:
+                    self.forget(old.job_id)
+                self._slots[slot] = job.job_id
+            self._jobs[job.job_id] = job
+
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                job.result = self._cache[key]
+                job.end(DONE)
+                return job.job_id
+
+            in_specs, out_specs = {}, {}
+            for name, arr in inputs.items():
+                shm, buf, spec = _create(arr.shape, arr.dtype)
+                buf[...] = arr
+                job.blocks.append(shm)
+                in_specs[name] = spec
+            for name, desc in outputs.items():
+                shape, dtype = desc if isinstance(desc, tuple) else ((n_rows,), desc)
+                shm, buf, spec = _create(shape, dtype)
+                job.blocks.append(shm)
+                job.outputs[name] = buf
+                out_specs[name] = spec
+            shm, job.flag, flag_spec = _create((1,), np.uint8)
+            job.flag[0] = 0
+            job.blocks.append(shm)
+            shm, job.progress, progress_spec = _create((job.n_chunks,), np.uint8)
+            job.progress[:] = 0
+            job.blocks.append(shm)
+
+            pool = self._executor()
+            job.state = RUNNING
+            for chunk in range(job.n_chunks):
+                start, stop = chunk * chunk_size, min(n_rows, (chunk + 1) * chunk_size)
+                fut = pool.submit(_run_chunk, kernel, in_specs, out_specs, flag_spec,
+                                  progress_spec, chunk, start, stop, params)
+                # Track the future before its callback can fire (it runs inline if already done).
+                job.futures.append(fut)
+                fut.add_done_callback(lambda f, j=job: self._on_chunk_done(j, f))
+        return job.job_id
+
+    def _on_chunk_done(self, job: _Job, fut):
+        with self._lock:
+            job.finished += 1
+            if job.state == RUNNING:
+                if not fut.cancelled() and fut.exception() is not None:
+                    job.end(FAILED, repr(fut.exception()))
+                    job.flag[0] = 1
+                    for f in job.futures:
+                        f.cancel()
+                elif job.finished == job.n_chunks:
+                    job.result = {k: np.array(v) for k, v in job.outputs.items()}
+                    job.end(DONE)
+                    self._cache_put(job.key, job.result)
+            # Unlink the blocks once no chunk can touch them any more.
+            if job.blocks and job.finished == job.n_chunks:
+                job.release()
+
+    # ---- bookkeeping ----
+    def _cache_put(self, key: str, result: dict):
+        """LRU insert, evicting until both the entry and the byte budgets hold."""
+        nbytes = sum(v.nbytes for v in result.values())
+        if nbytes > self._cache_bytes:
+            return
+        old = self._cache.pop(key, None)
+        if old is not None:
+            self._cache_nbytes -= sum(v.nbytes for v in old.values())
+        self._cache[key] = result
+        self._cache_nbytes += nbytes
+        while len(self._cache) > self._cache_size or self._cache_nbytes > self._cache_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_nbytes -= sum(v.nbytes for v in evicted.values())
+
+    def _prune(self):
+        """Forget ended jobs that no slot refers to once they are older than the TTL."""
+        cutoff = time.monotonic() - self._job_ttl
+        in_slots = set(self._slots.values())
+        for job_id, job in list(self._jobs.items()):
+            if job.ended is not None and job.ended < cutoff and job_id not in in_slots:
+                del self._jobs[job_id]
+
+    # ---- control ----
+    def status(self, job_id: str) -> JobStatus:
+        with self._lock:
+            job = self._jobs[job_id]
+            if job.state == DONE:
+                frac = 1.0
+            elif job.progress is not None:
+                frac = float(job.progress.sum()) / job.n_chunks
+            else:
+                frac = 0.0
+            return JobStatus(job_id, job.state, frac, job.error)
+
+    def result(self, job_id: str) -> dict:
+        """Output arrays of a finished job (raises if it is not done)."""
+        with self._lock:
+            job = self._jobs[job_id]
+            if job.state != DONE:
+                raise RuntimeError(f"Job {job_id} is {job.state}, not {DONE}.")
+            return job.result
+
+    def cancel(self, job_id: str) -> None:
+        """Stop a job: queued chunks are dropped, running chunks finish and are discarded."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state not in (PENDING, RUNNING):
+                return
+            job.end(CANCELLED)
+            job.flag[0] = 1
+            for f in job.futures:
+                f.cancel()
+            if job.blocks and job.finished == job.n_chunks:
+                job.release()
+
+    def forget(self, job_id: str) -> None:
+        """Drop bookkeeping for a job (its cached result stays available by key)."""
+        with self._lock:
+            self.cancel(job_id)
+            self._jobs.pop(job_id, None)
+            for slot, jid in list(self._slots.items()):
+                if jid == job_id:
+                    del self._slots[slot]
+
+    def cached(self, key: str):
+        with self._lock:
+            return self._cache.get(key)
+
+    def shutdown(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+            for job in jobs:
+                self.cancel(job.job_id)
+            pool, self._pool = self._pool, None
+        # Wait outside the lock: completing chunks run _on_chunk_done, which takes it.
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            for job in jobs:
+                if job.blocks:
+                    job.release()
+
+
+# --- Process-wide runner shared by all sessions ---
+_RUNNER = None
+_RUNNER_LOCK = threading.Lock()
+
+
+def get_runner() -> JobRunner:
+    global _RUNNER
+    with _RUNNER_LOCK:
+        if _RUNNER is None:
+            _RUNNER = JobRunner()
+        return _RUNNER
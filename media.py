@@ -0,0 +1,119 @@
+# media.py
+"""
+Lightweight media helpers for the Videos & Slides page.
+
+- Image variants: resized, compressed copies of large assets are built once
+  into ``static/cache`` (served by Streamlit's static file server) and shown
+  through an ``<img srcset>`` so the browser downloads only the size that
+  fits its container.
+- YouTube thumbnails: served straight from YouTube's image CDN while a
+  background thread caches them next to the image variants, so a video slot
+  costs one small JPEG until a student actually presses play.
+"""
+import hashlib
+import re
+import threading
+import urllib.request
+from pathlib import Path
+
+from PIL import Image
+
+STATIC_DIR = Path("static")
+CACHE_DIR = STATIC_DIR / "cache"
+STATIC_URL = "app/static"           # where Streamlit serves STATIC_DIR
+VARIANT_WIDTHS = (480, 960, 1600)
+
+
+# --- Image variants ---
+def _fingerprint(path: Path) -> str:
+    info = path.stat()
+    return hashlib.sha1(f"{path.name}:{info.st_size}:{info.st_mtime_ns}".encode()).hexdigest()[:10]
+
+def _slug(path: Path) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", path.stem).strip("-").lower() or "image"
+
+def _save(img: Image.Image, dest: Path) -> Path:
+    try:
+        img.save(dest, format="WEBP", quality=80, method=4)
+        return dest
+    except (OSError, KeyError):
+        # Pillow without WebP support: fall back to JPEG/PNG.
+        alt = dest.with_suffix(".png" if img.mode in ("RGBA", "LA", "P") else ".jpg")
+        img.save(alt, optimize=True, **({"quality": 82} if alt.suffix == ".jpg" else {}))
+        return alt
+
+def build_variants(path, widths=VARIANT_WIDTHS) -> dict:
+    """
+    Resized copies of ``path`` keyed by width (px). Existing variants are
+    reused as long as the source file is unchanged; no variant is wider than
+    the original.
+    """
+    path = Path(path)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tag = f"{_slug(path)}-{_fingerprint(path)}"
+    with Image.open(path) as src:
+        targets = sorted(set(min(w, src.width) for w in widths))
+        cached = {w: next(CACHE_DIR.glob(f"{tag}-{w}.*"), None) for w in targets}
+        if all(cached.values()):
+            return cached
+
+        src.load()
+        if src.mode not in ("RGB", "RGBA"):
+            src = src.convert("RGBA" if "A" in src.getbands() else "RGB")
+        variants = {}
+        for w in targets:
+            img = src if w == src.width else src.resize((w, round(src.height * w / src.width)), Image.LANCZOS)
+            variants[w] = _save(img, CACHE_DIR / f"{tag}-{w}.webp")
+    return variants
+
+def static_url(path: Path) -> str:
+    return f"{STATIC_URL}/{Path(path).relative_to(STATIC_DIR).as_posix()}"
+
+def responsive_img_html(variants: dict, alt: str = "", sizes: str = "(max-width: 900px) 100vw, 1100px") -> str:
+    """``<img>`` tag whose srcset lets the browser pick the right variant for its width."""
+    srcset = ", ".join(f"{static_url(p)} {w}w" for w, p in sorted(variants.items()))
+    fallback = static_url(variants[min(variants)])
+    return (f'<img src="{fallback}" srcset="{srcset}" sizes="{sizes}" alt="{alt}" '
+            f'loading="lazy" decoding="async" style="width:100%;height:auto;border-radius:10px;"/>')
+
+
+# --- YouTube ---
+def youtube_id(url: str) -> str:
+    """Video id from watch?v=, youtu.be/ or /embed/ URLs ('' if not found)."""
+    m = re.search(r"(?:v=|youtu\.be/|/embed/|/shorts/)([A-Za-z0-9_-]{11})", url)
+    return m.group(1) if m else ""
+
+def _thumbnail_paths(url: str):
+    vid = youtube_id(url)
+    return f"https://i.ytimg.com/vi/{vid}/hqdefault.jpg", CACHE_DIR / f"yt-{vid}.jpg"
+
+def youtube_thumbnail(url: str) -> str:
+    """
+    URL of a thumbnail for ``url``: the locally cached copy once it exists,
+    otherwise YouTube's own image CDN. Never blocks on the network.
+    """
+    remote, dest = _thumbnail_paths(url)
+    return static_url(dest) if dest.exists() else remote
+
+def fetch_youtube_thumbnail(url: str, timeout: float = 3.0) -> bool:
+    """Download the thumbnail into the cache (no-op if present); False if it could not be fetched."""
+    remote, dest = _thumbnail_paths(url)
+    if dest.exists():
+        return True
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with urllib.request.urlopen(remote, timeout=timeout) as resp:
+            data = resp.read()
+        tmp = dest.with_suffix(".part")
+        tmp.write_bytes(data)
+        tmp.replace(dest)
+        return True
+    except OSError:
+        return False
+
+def warm_youtube_thumbnails(urls) -> threading.Thread:
+    """Fetch thumbnails in a background daemon thread so page renders never wait on YouTube."""
+    t = threading.Thread(target=lambda: [fetch_youtube_thumbnail(u) for u in urls],
+                         name="yt-thumbnails", daemon=True)
+    t.start()
+    return t
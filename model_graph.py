@@ -0,0 +1,121 @@
+# model_graph.py
+"""
+Calibrated GFR model expressed as a dependency graph of named nodes.
+
+Each node (Pgc, RPF, NFP, GFR, RBF, FF) declares the inputs/nodes it depends
+on and is memoized. Changing an input only invalidates the nodes downstream
+of it, e.g. Hct only touches RBF, and Pbs/pi_gc/Kf never touch Pgc or RPF.
+
+Nodes are the per-equation NumPy functions generated from ``model_spec``, so
+any input may be an array: sweeping one parameter recomputes only its
+downstream nodes and reuses the intermediate arrays of everything else.
+"""
+import numpy as np
+
+from model_spec import GFR_MODEL
+
+INPUTS = GFR_MODEL.inputs
+
+# Calibrated baseline: GFR ~126 mL/min, RPF 650 mL/min, FF ~19%
+BASELINE = dict(GFR_MODEL.defaults)
+
+# name -> (dependencies, function), generated from the equations in model_spec; topological order
+NODES = dict(GFR_MODEL.nodes)
+
+
+def _downstream(nodes: dict) -> dict:
+    """Map every input/node name to the set of nodes that (transitively) depend on it."""
+    direct = {}
+    for name, (deps, _) in nodes.items():
+        for d in deps:
+            direct.setdefault(d, set()).add(name)
+    closure = {}
+    for name in list(INPUTS) + list(nodes):
+        seen, stack = set(), list(direct.get(name, ()))
+        while stack:
+            n = stack.pop()
+            if n not in seen:
+                seen.add(n)
+                stack.extend(direct.get(n, ()))
+        closure[name] = seen
+    return closure
+
+
+_DOWNSTREAM = _downstream(NODES)
+
+
+def _same(a, b) -> bool:
+    if a is b:
+        return True
+    a, b = np.asarray(a), np.asarray(b)
+    return a.shape == b.shape and bool(np.array_equal(a, b))
+
+
+class ModelGraph:
+    """
+    Memoized model state. ``g.update(Hct=50.0)`` invalidates only RBF, so a
+    following ``g["GFR"]`` is served from the memo.
+    """
+
+    def __init__(self, params: dict, nodes: dict = None):
+        self.nodes = nodes or NODES
+        self._downstream = _DOWNSTREAM if nodes is None else _downstream(self.nodes)
+        self.inputs = {k: params[k] for k in INPUTS}
+        self._memo = {}
+        self.evaluations = {name: 0 for name in self.nodes}
+
+    def __getitem__(self, name: str):
+        if name in self.inputs:
+            return self.inputs[name]
+        if name not in self._memo:
+            deps, fn = self.nodes[name]
+            self._memo[name] = fn(*(self[d] for d in deps))
+            self.evaluations[name] += 1
+        return self._memo[name]
+
+    def update(self, **changes) -> set:
+        """Set inputs and drop memoized nodes downstream of the ones that changed."""
+        stale = set()
+        for k, v in changes.items():
+            if k not in self.inputs:
+                raise KeyError(f"Unknown model input: {k}")
+            if not _same(self.inputs[k], v):
+                self.inputs[k] = v
+                stale |= self._downstream[k]
+        for name in stale:
+            self._memo.pop(name, None)
+        return stale
+
+    def derive(self, **changes) -> "ModelGraph":
+        """New graph with some inputs replaced, sharing every memoized node not downstream of them."""
+        child = ModelGraph.__new__(ModelGraph)
+        child.nodes, child._downstream = self.nodes, self._downstream
+        child.inputs, child._memo = dict(self.inputs), dict(self._memo)
+        child.evaluations = {name: 0 for name in self.nodes}
+        child.update(**changes)
+        return child
+
+    def sweep(self, name: str, values, outputs=None) -> dict:
+        """Outputs with input ``name`` replaced by an array of values; this graph is left untouched."""
+        child = self.derive(**{name: np.asarray(values, dtype=float)})
+        return child.outputs(outputs)
+
+    def adaptive_sweep(self, name: str, lo: float, hi: float, outputs=None, **kw):
+        """
+        ``(values, outputs)`` for ``name`` swept over ``[lo, hi]`` with points placed
+        adaptively (dense at clamps/corners, sparse on straight stretches).
+        Extra keywords go to ``sampling.adaptive_sample``.
+        """
+        from sampling import adaptive_sample
+        names = list(outputs or self.nodes)
+        x, ys = adaptive_sample(lambda v: tuple(self.sweep(name, v, names)[n] for n in names), lo, hi, **kw)
+        return x, dict(zip(names, ys))
+
+    def outputs(self, names=None) -> dict:
+        return {n: self[n] for n in (names or self.nodes)}
+
+
+def compute_graph_outputs(p: dict) -> dict:
+    """One-shot evaluation with the same keys as the pages' ``compute_outputs``."""
+    out = ModelGraph(p).outputs(("GFR", "RPF", "RBF", "FF", "Pgc", "NFP"))
+    return {k: (float(v) if np.ndim(v) == 0 else v) for k, v in out.items()}
@@ -0,0 +1,345 @@
+# model_spec.py
+"""
+Single declarative definition of the calibrated GFR model.
+
+Each output is a named equation (with unit and optional clamp) written with
+ordinary arithmetic on symbols; each input is a ``Param`` with default,
+slider range, step and unit. From that one definition ``Model`` generates,
+compiles and caches at import time:
+
+- ``compute(p)``    plain-float scalar function (fastest for a single state)
+- ``batch(p)``      NumPy version for arrays of any broadcastable shape
+- ``jacobian(p)``   analytic ∂output/∂input (chain rule through the nodes)
+- ``nodes``         per-equation NumPy functions for ``model_graph.ModelGraph``
+- ``solve(...)``    inverse solve for one input given a target output
+
+``Model.source`` shows the generated code.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+
+# --- Expressions ---
+class Expr:
+    """Symbolic expression node; arithmetic on Expr/number builds a tree."""
+
+    def __add__(self, o): return _add(self, _wrap(o))
+    def __radd__(self, o): return _add(_wrap(o), self)
+    def __sub__(self, o): return _sub(self, _wrap(o))
+    def __rsub__(self, o): return _sub(_wrap(o), self)
+    def __mul__(self, o): return _mul(self, _wrap(o))
+    def __rmul__(self, o): return _mul(_wrap(o), self)
+    def __truediv__(self, o): return _div(self, _wrap(o))
+    def __rtruediv__(self, o): return _div(_wrap(o), self)
+    def __neg__(self): return _mul(Const(-1.0), self)
+    def __gt__(self, o): return Cmp(">", self, _wrap(o))
+    def __ge__(self, o): return Cmp(">=", self, _wrap(o))
+    def __lt__(self, o): return Cmp("<", self, _wrap(o))
+    def __le__(self, o): return Cmp("<=", self, _wrap(o))
+
+
+@dataclass(frozen=True, eq=False)
+class Const(Expr):
+    value: float
+
+@dataclass(frozen=True, eq=False)
+class Sym(Expr):
+    name: str
+
+@dataclass(frozen=True, eq=False)
+class Bin(Expr):
+    op: str          # + - * /
+    a: Expr
+    b: Expr
+
+@dataclass(frozen=True, eq=False)
+class Ext(Expr):
+    op: str          # max | min
+    a: Expr
+    b: Expr
+
+@dataclass(frozen=True, eq=False)
+class Cmp(Expr):
+    op: str
+    a: Expr
+    b: Expr
+
+@dataclass(frozen=True, eq=False)
+class Where(Expr):
+    cond: Cmp
+    a: Expr
+    b: Expr
+
+
+def _wrap(x) -> Expr:
+    return x if isinstance(x, Expr) else Const(float(x))
+
+def _is(e: Expr, v: float) -> bool:
+    return isinstance(e, Const) and e.value == v
+
+# Constructors fold constants and identities so derivatives stay compact.
+def _add(a, b):
+    if isinstance(a, Const) and isinstance(b, Const):
+        return Const(a.value + b.value)
+    return b if _is(a, 0.0) else a if _is(b, 0.0) else Bin("+", a, b)
+
+def _sub(a, b):
+    if isinstance(a, Const) and isinstance(b, Const):
+        return Const(a.value - b.value)
+    return a if _is(b, 0.0) else _mul(Const(-1.0), b) if _is(a, 0.0) else Bin("-", a, b)
+
+def _mul(a, b):
+    if isinstance(a, Const) and isinstance(b, Const):
+        return Const(a.value * b.value)
+    if _is(a, 0.0) or _is(b, 0.0):
+        return Const(0.0)
+    return b if _is(a, 1.0) else a if _is(b, 1.0) else Bin("*", a, b)
+
+def _div(a, b):
+    if isinstance(a, Const) and isinstance(b, Const) and b.value != 0:
+        return Const(a.value / b.value)
+    return Const(0.0) if _is(a, 0.0) else a if _is(b, 1.0) else Bin("/", a, b)
+
+def maximum(a, b) -> Expr:
+    return Ext("max", _wrap(a), _wrap(b))
+
+def minimum(a, b) -> Expr:
+    return Ext("min", _wrap(a), _wrap(b))
+
+def clip(x, lo, hi) -> Expr:
+    return minimum(maximum(x, lo), hi)
+
+def where(cond: Cmp, a, b) -> Expr:
+    a, b = _wrap(a), _wrap(b)
+    if isinstance(a, Const) and isinstance(b, Const) and a.value == b.value:
+        return a
+    return Where(cond, a, b)
+
+
+def symbols(e: Expr) -> list:
+    """Names referenced by ``e``, in first-use order."""
+    out = []
+    def walk(n):
+        if isinstance(n, Sym):
+            if n.name not in out:
+                out.append(n.name)
+        elif isinstance(n, Where):
+            walk(n.cond), walk(n.a), walk(n.b)
+        elif isinstance(n, (Bin, Ext, Cmp)):
+            walk(n.a), walk(n.b)
+    walk(e)
+    return out
+
+
+def diff(e: Expr, name: str) -> Expr:
+    """∂e/∂name. Kinks (max/min/clamps) take the derivative of the active branch."""
+    if isinstance(e, Const):
+        return Const(0.0)
+    if isinstance(e, Sym):
+        return Const(1.0 if e.name == name else 0.0)
+    if isinstance(e, Bin):
+        da, db = diff(e.a, name), diff(e.b, name)
+        if e.op == "+":
+            return _add(da, db)
+        if e.op == "-":
+            return _sub(da, db)
+        if e.op == "*":
+            return _add(_mul(da, e.b), _mul(e.a, db))
+        return _sub(_div(da, e.b), _div(_mul(e.a, db), _mul(e.b, e.b)))
+    if isinstance(e, Ext):
+        cond = Cmp(">=" if e.op == "max" else "<=", e.a, e.b)
+        return where(cond, diff(e.a, name), diff(e.b, name))
+    if isinstance(e, Where):
+        return where(e.cond, diff(e.a, name), diff(e.b, name))
+    raise TypeError(f"Cannot differentiate {e!r}")
+
+
+def to_code(e: Expr, numpy: bool) -> str:
+    """Python source for ``e``: plain floats (``numpy=False``) or NumPy arrays."""
+    if isinstance(e, Const):
+        return repr(e.value)
+    if isinstance(e, Sym):
+        return e.name
+    if isinstance(e, (Bin, Cmp)):
+        return f"({to_code(e.a, numpy)} {e.op} {to_code(e.b, numpy)})"
+    if isinstance(e, Ext):
+        fn = ("np.maximum" if e.op == "max" else "np.minimum") if numpy else e.op
+        return f"{fn}({to_code(e.a, numpy)}, {to_code(e.b, numpy)})"
+    if isinstance(e, Where):
+        c, a, b = (to_code(x, numpy) for x in (e.cond, e.a, e.b))
+        return f"np.where({c}, {a}, {b})" if numpy else f"({a} if {c} else {b})"
+    raise TypeError(f"Cannot generate code for {e!r}")
+
+
+# --- Specification ---
+@dataclass(frozen=True)
+class Param:
+    name: str
+    default: float
+    lo: float
+    hi: float
+    step: float
+    unit: str = ""
+    label: str = ""
+
+
+@dataclass(frozen=True)
+class Equation:
+    """``name = fn(symbols)``, optionally clamped to ``[lo, hi]``."""
+    name: str
+    fn: object          # callable taking a symbol namespace, returning an Expr
+    unit: str = ""
+    lo: float = None
+    hi: float = None
+    label: str = ""
+
+
+class _Namespace:
+    def __getattr__(self, name):
+        return Sym(name)
+
+
+class Model:
+    """Compiles a list of params and equations into scalar, batch and Jacobian functions."""
+
+    def __init__(self, params, equations):
+        self.params = tuple(params)
+        self.equations = tuple(equations)
+        self.inputs = tuple(p.name for p in self.params)
+        self.outputs = tuple(q.name for q in self.equations)
+        self.defaults = {p.name: float(p.default) for p in self.params}
+        self.units = {**{p.name: p.unit for p in self.params}, **{q.name: q.unit for q in self.equations}}
+
+        ns, known = _Namespace(), set(self.inputs)
+        self.exprs = {}
+        for q in self.equations:
+            e = _wrap(q.fn(ns))
+            if q.lo is not None:
+                e = maximum(e, q.lo)
+            if q.hi is not None:
+                e = minimum(e, q.hi)
+            unknown = set(symbols(e)) - known
+            if unknown:
+                raise ValueError(f"{q.name} uses undefined symbols {sorted(unknown)} (equations must be in order).")
+            self.exprs[q.name] = e
+            known.add(q.name)
+
+        self.source = self._generate()
+        env = {"np": np}
+        exec(compile(self.source, f"<model_spec:{id(self):x}>", "exec"), env)
+        self._scalar, self._batch, self._jac = env["_scalar"], env["_batch"], env["_jacobian"]
+        self.nodes = {q: (tuple(symbols(self.exprs[q])), env[f"_node_{q}"]) for q in self.outputs}
+
+    # --- Code generation ---
+    def _generate(self) -> str:
+        args = ", ".join(self.inputs)
+        outs = ", ".join(self.outputs)
+        lines = [f"def _scalar({args}):"]
+        lines += [f"    {q} = {to_code(e, False)}" for q, e in self.exprs.items()]
+        lines += [f"    return ({outs},)", ""]
+
+        lines += [f"def _batch({args}):", "    with np.errstate(divide='ignore', invalid='ignore'):"]
+        lines += [f"        {q} = {to_code(e, True)}" for q, e in self.exprs.items()]
+        lines += [f"    return ({outs},)", ""]
+
+        # Forward-mode chain rule: d_<node>__<input> = Σ_s ∂node/∂s · d_<s>__<input>
+        lines += [f"def _jacobian({args}):", "    with np.errstate(divide='ignore', invalid='ignore'):"]
+        known = {}   # (node, input) -> Expr (Const if structurally constant, else Sym of its variable)
+        for q, e in self.exprs.items():
+            lines.append(f"        {q} = {to_code(e, True)}")
+            partials = {s: diff(e, s) for s in symbols(e)}
+            for x in self.inputs:
+                total = Const(0.0)
+                for s, ds in partials.items():
+                    chain = Const(1.0 if s == x else 0.0) if s in self.inputs else known[(s, x)]
+                    total = _add(total, _mul(ds, chain))
+                if isinstance(total, Const):
+                    known[(q, x)] = total
+                else:
+                    var = f"d_{q}__{x}"
+                    lines.append(f"        {var} = {to_code(total, True)}")
+                    known[(q, x)] = Sym(var)
+        jac = ", ".join("{" + ", ".join(f"{x!r}: {to_code(known[(q, x)], True)}" for x in self.inputs) + "}"
+                        for q in self.outputs)
+        lines += [f"    return ({outs},), ({jac},)", ""]
+
+        for q, e in self.exprs.items():
+            lines += [f"def _node_{q}({', '.join(symbols(e))}):",
+                      "    with np.errstate(divide='ignore', invalid='ignore'):",
+                      f"        return {to_code(e, True)}", ""]
+        return "\n".join(lines)
+
+    # --- Evaluation ---
+    def _args(self, p: dict, cast) -> list:
+        return [cast(p[k]) if k in p else self.defaults[k] for k in self.inputs]
+
+    def compute(self, p: dict) -> dict:
+        """Scalar evaluation; missing inputs take their defaults."""
+        return dict(zip(self.outputs, self._scalar(*self._args(p, float))))
+
+    def batch(self, p: dict) -> dict:
+        """Vectorized evaluation over arrays (broadcast against each other)."""
+        return dict(zip(self.outputs, self._batch(*self._args(p, lambda v: np.asarray(v, dtype=float)))))
+
+    def jacobian(self, p: dict, outputs=None, inputs=None):
+        """``(values, J)`` with ``J[output][input]`` = analytic ∂output/∂input (scalars or arrays)."""
+        values, rows = self._jac(*self._args(p, lambda v: np.asarray(v, dtype=float)))
+        outputs, inputs = outputs or self.outputs, inputs or self.inputs
+        idx = {q: i for i, q in enumerate(self.outputs)}
+        return ({q: values[idx[q]] for q in outputs},
+                {q: {x: rows[idx[q]][x] for x in inputs} for q in outputs})
+
+    def solve(self, output: str, target: float, param: str, p: dict, tol: float = 1e-6, max_iter: int = 50) -> float:
+        """
+        Value of input ``param`` (within its slider range) that makes ``output``
+        equal ``target``, other inputs as in ``p``. Newton steps on the analytic
+        derivative, safeguarded by bisection; raises ``ValueError`` if the
+        target is not reachable inside the range.
+        """
+        spec = next(q for q in self.params if q.name == param)
+        state = {**self.defaults, **p}
+        f = lambda v: self.compute({**state, param: v})[output] - target
+        lo, hi = float(spec.lo), float(spec.hi)
+        f_lo, f_hi = f(lo), f(hi)
+        if f_lo * f_hi > 0:
+            raise ValueError(f"{output} = {target} is not reachable with {param} in [{lo}, {hi}].")
+        x = min(max(float(state[param]), lo), hi)
+        for _ in range(max_iter):
+            fx = f(x)
+            if abs(fx) <= tol:
+                return x
+            if (fx < 0) == (f_lo < 0):
+                lo, f_lo = x, fx
+            else:
+                hi = x
+            slope = float(self.jacobian({**state, param: x}, (output,), (param,))[1][output][param])
+            step = x - fx / slope if slope else None
+            x = step if step is not None and lo < step < hi else 0.5 * (lo + hi)
+        return x
+
+
+# --- The calibrated GFR model ---
+# Baseline (MAP 100, Ra 1, Re 2): Pgc 56, RPF 650, NFP 21, GFR 126 mL/min, FF ~19%.
+GFR_MODEL = Model(
+    params=(
+        Param("MAP", 100.0, 40.0, 220.0, 1.0, "mmHg", "Mean arterial pressure"),
+        Param("Ra", 1.0, 0.5, 5.0, 0.1, "relative", "Afferent arteriolar resistance"),
+        Param("Re", 2.0, 0.5, 6.0, 0.1, "relative", "Efferent arteriolar resistance"),
+        Param("Pbs", 10.0, 5.0, 40.0, 1.0, "mmHg", "Bowman's space pressure"),
+        Param("Kf", 6.0, 2.0, 12.0, 0.5, "mL/min/mmHg", "Ultrafiltration coefficient"),
+        Param("pi_gc", 25.0, 15.0, 35.0, 1.0, "mmHg", "Glomerular oncotic pressure"),
+        Param("Hct", 45.0, 20.0, 60.0, 1.0, "%", "Hematocrit"),
+    ),
+    equations=(
+        # Efferent share of resistance raises Pgc; mild direct MAP effect.
+        Equation("Pgc", lambda s: 48.0 + 12.0 * s.Re / maximum(1e-6, s.Ra + s.Re) + 0.12 * (s.MAP - 100.0),
+                 "mmHg", lo=40.0, hi=80.0, label="Glomerular capillary pressure"),
+        Equation("RPF", lambda s: s.MAP / maximum(0.1, s.Ra + 1.5 * s.Re) * 26.0,
+                 "mL/min", label="Renal plasma flow"),
+        Equation("NFP", lambda s: s.Pgc - s.Pbs - s.pi_gc, "mmHg", label="Net filtration pressure"),
+        Equation("GFR", lambda s: maximum(0.0, s.Kf * s.NFP), "mL/min", label="Glomerular filtration rate"),
+        Equation("RBF", lambda s: s.RPF / maximum(1e-6, 1.0 - s.Hct / 100.0), "mL/min", label="Renal blood flow"),
+        Equation("FF", lambda s: where(s.RPF > 0.0, 100.0 * s.GFR / s.RPF, 0.0), "%", label="Filtration fraction"),
+    ),
+)
@@ -1,6 +1,7 @@
 # pages/01_📘_GFR_Introduction.py
 import streamlit as st
 from utils_nav import render_sidebar
+from egfr import ckd_epi_2021_cr, ckd_epi_2021_cr_cys, ckd_stage, cockcroft_gault, mdrd
 
 st.set_page_config(page_title="GFR — Introduction", layout="wide")
 render_sidebar()
@@ -166,6 +167,28 @@ st.markdown(
 """
 )
 
+# ─────────────────────────────
+# 🧪 Estimating GFR in the Clinic
+# ─────────────────────────────
+st.subheader("🧪 Estimating GFR in the Clinic")
+st.markdown("In practice GFR is **estimated (eGFR)** from serum creatinine (± cystatin C), age and sex. Try the common equations:")
+
+with st.expander("eGFR calculator", expanded=False):
+    e1, e2, e3, e4, e5 = st.columns(5)
+    scr = e1.number_input("Creatinine (mg/dL)", 0.2, 15.0, 1.0, 0.1)
+    scys = e2.number_input("Cystatin C (mg/L)", 0.3, 8.0, 0.9, 0.1)
+    age = e3.number_input("Age (years)", 18, 100, 50, 1)
+    weight = e4.number_input("Weight (kg)", 30.0, 200.0, 70.0, 1.0)
+    female = e5.radio("Sex", ["Female", "Male"], horizontal=True) == "Female"
+
+    egfr_cr = float(ckd_epi_2021_cr(scr, age, female))
+    r1, r2, r3, r4 = st.columns(4)
+    r1.metric("CKD-EPI 2021 (Cr)", f"{egfr_cr:.0f}", ckd_stage(egfr_cr).item(), delta_color="off")
+    r2.metric("CKD-EPI 2021 (Cr–Cys)", f"{float(ckd_epi_2021_cr_cys(scr, scys, age, female)):.0f}")
+    r3.metric("MDRD", f"{float(mdrd(scr, age, female)):.0f}")
+    r4.metric("Cockcroft–Gault CrCl", f"{float(cockcroft_gault(scr, age, weight, female)):.0f} mL/min")
+    st.caption("eGFR in mL/min/1.73 m²; Cockcroft–Gault gives creatinine clearance in mL/min. Stage = KDIGO G-category.")
+
 # ─────────────────────────────
 # 🧭 Study Tips
 # ─────────────────────────────
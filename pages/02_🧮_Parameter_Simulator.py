@@ -1,34 +1,28 @@
 # pages/02_📊_Parameter_Simulator.py
 import streamlit as st
 
-try:
-    from physiology import compute_outputs as _physio_compute  # optional
-    HAVE_PHYSIO = True
-except Exception:
-    HAVE_PHYSIO = False
-
-from utils_nav import render_sidebar
+from utils_nav import follow_toggle, fragment, instructor_panel, live_broadcast_panel, render_sidebar
+from state_codec import PARAM_FIELDS, encode, try_decode
+from uncertainty import DEFAULT_SD, propagate
+from physiology import BASELINE, compute_outputs
 st.set_page_config(page_title="GFR — Parameter Simulator", layout="wide")
 render_sidebar()
 
 st.title("📊 Parameter Simulator")
 st.caption("Manipulate Starling forces and hemodynamic parameters to see real-time effects on GFR, RPF, FF, Pgc, NFP and RBF.")
 
-# ---------------- Baseline (calibrated) ----------------
-BASELINE = {
-    "MAP": 100.0,  # mmHg
-    "Ra": 1.0,     # relative
-    "Re": 2.0,     # relative
-    "Pbs": 10.0,   # mmHg
-    "Kf": 6.0,     # mL/min/mmHg
-    "pi_gc": 25.0, # mmHg
-    "Hct": 45.0,   # %
-}
-
+# ---------------- Baseline (calibrated, see model_spec) ----------------
 # set defaults in session_state once
 for k, v in BASELINE.items():
     st.session_state.setdefault(k, v)
 
+# A new ?sim= token (shared link, back button) overrides the sliders.
+_token = st.query_params.get("sim")
+if _token and _token != st.session_state.get("_sim_token"):
+    _url_state = try_decode(PARAM_FIELDS, _token)
+    if _url_state:
+        st.session_state.update(_url_state)
+
 # Unified rerun that works on old/new Streamlit
 def _rerun():
     if hasattr(st, "rerun"):
@@ -36,68 +30,84 @@ def _rerun():
     elif hasattr(st, "experimental_rerun"):
         st.experimental_rerun()
 
-# ---------------- Calibrated fallback (same as Quick Scenarios) ----------------
-def _fallback_compute(p: dict) -> dict:
-    MAP, Ra, Re = float(p["MAP"]), float(p["Ra"]), float(p["Re"])
-    Pbs, Kf, pi_gc, Hct = float(p["Pbs"]), float(p["Kf"]), float(p["pi_gc"]), float(p["Hct"])
-
-    eff_ratio = Re / max(1e-6, (Ra + Re))
-    Pgc = 48.0 + 12.0 * eff_ratio + 0.12 * (MAP - 100.0)
-    Pgc = min(max(Pgc, 40.0), 80.0)
-
-    denom = max(0.1, Ra + 1.5 * Re)
-    RPF = (MAP / denom) * 26.0  # ≈650 mL/min at baseline
-
-    NFP = Pgc - Pbs - pi_gc
-    GFR = max(0.0, Kf * NFP)
-
-    RBF = RPF / max(1e-6, (1.0 - Hct / 100.0))
-    FF = (GFR / RPF) * 100.0 if RPF > 0 else 0.0
-    return {"GFR": GFR, "RPF": RPF, "RBF": RBF, "FF": FF, "Pgc": Pgc, "NFP": NFP}
-
-def compute_outputs(p: dict) -> dict:
-    return _physio_compute(p) if HAVE_PHYSIO else _fallback_compute(p)
-
-# ---------------- Controls ----------------
-st.markdown("### Hemodynamic Parameter Manipulation")
-
-c1, c2, c3 = st.columns(3)
-st.session_state["MAP"] = c1.slider("Mean Arterial Pressure (MAP) [mmHg]", 40.0, 220.0, float(st.session_state["MAP"]), 1.0)
-st.session_state["Ra"]  = c2.slider("Afferent Arteriolar Resistance (Ra) [relative units]", 0.5, 5.0, float(st.session_state["Ra"]), 0.1)
-st.session_state["Re"]  = c3.slider("Efferent Arteriolar Resistance (Re) [relative units]", 0.5, 6.0, float(st.session_state["Re"]), 0.1)
-
-c4, c5, c6 = st.columns(3)
-st.session_state["Pbs"]   = c4.slider("Bowman's Capsule Pressure (Pbs) [mmHg]", 5.0, 40.0, float(st.session_state["Pbs"]), 1.0)
-st.session_state["Kf"]    = c5.slider("Ultrafiltration Coefficient (Kf) [mL/min/mmHg]", 2.0, 12.0, float(st.session_state["Kf"]), 0.5)
-st.session_state["pi_gc"] = c6.slider("Plasma Oncotic Pressure (πgc) [mmHg]", 15.0, 35.0, float(st.session_state["pi_gc"]), 1.0)
-
-st.session_state["Hct"] = st.slider("Hematocrit (%)", 20.0, 60.0, float(st.session_state["Hct"]), 1.0)
-
-col_reset, col_norm = st.columns([1,1])
-with col_reset:
-    if st.button("↩️ Reset to Baseline", use_container_width=True):
-        for k, v in BASELINE.items():
-            st.session_state[k] = v
-        _rerun()
-with col_norm:
-    if st.button("✅ Set Normal Defaults", use_container_width=True):
-        for k, v in BASELINE.items():
-            st.session_state[k] = v
-        _rerun()
-
-# ---------------- Compute ----------------
-params = {k: st.session_state[k] for k in BASELINE.keys()}
-out = compute_outputs(params)
-
-# ---------------- Results ----------------
-st.markdown("### Calculated Results")
-m1, m2, m3, m4, m5, m6 = st.columns(6)
-m1.metric("GFR", f"{out['GFR']:.1f} mL/min")
-m2.metric("RPF", f"{out['RPF']:.1f} mL/min")
-m3.metric("RBF", f"{out['RBF']:.1f} mL/min")
-m4.metric("FF", f"{out['FF']:.1f} %")
-m5.metric("Pgc", f"{out['Pgc']:.1f} mmHg")
-m6.metric("NFP", f"{out['NFP']:.1f} mmHg")
+# ---------------- Controls + Results (fragment) ----------------
+@fragment
+def simulator_panel():
+    # ---------------- Controls ----------------
+    st.markdown("### Hemodynamic Parameter Manipulation")
+
+    c1, c2, c3 = st.columns(3)
+    st.session_state["MAP"] = c1.slider("Mean Arterial Pressure (MAP) [mmHg]", 40.0, 220.0, float(st.session_state["MAP"]), 1.0)
+    st.session_state["Ra"]  = c2.slider("Afferent Arteriolar Resistance (Ra) [relative units]", 0.5, 5.0, float(st.session_state["Ra"]), 0.1)
+    st.session_state["Re"]  = c3.slider("Efferent Arteriolar Resistance (Re) [relative units]", 0.5, 6.0, float(st.session_state["Re"]), 0.1)
+
+    c4, c5, c6 = st.columns(3)
+    st.session_state["Pbs"]   = c4.slider("Bowman's Capsule Pressure (Pbs) [mmHg]", 5.0, 40.0, float(st.session_state["Pbs"]), 1.0)
+    st.session_state["Kf"]    = c5.slider("Ultrafiltration Coefficient (Kf) [mL/min/mmHg]", 2.0, 12.0, float(st.session_state["Kf"]), 0.5)
+    st.session_state["pi_gc"] = c6.slider("Plasma Oncotic Pressure (πgc) [mmHg]", 15.0, 35.0, float(st.session_state["pi_gc"]), 1.0)
+
+    st.session_state["Hct"] = st.slider("Hematocrit (%)", 20.0, 60.0, float(st.session_state["Hct"]), 1.0)
+
+    col_reset, col_norm = st.columns([1,1])
+    with col_reset:
+        if st.button("↩️ Reset to Baseline", use_container_width=True):
+            for k, v in BASELINE.items():
+                st.session_state[k] = v
+            _rerun()
+    with col_norm:
+        if st.button("✅ Set Normal Defaults", use_container_width=True):
+            for k, v in BASELINE.items():
+                st.session_state[k] = v
+            _rerun()
+
+    with st.expander("± Measurement uncertainty", expanded=False):
+        show_sd = st.toggle("Show ± 1 SD bands on GFR, RPF, FF and NFP", key="sim_show_sd")
+        u1, u2, u3, u4 = st.columns(4)
+        sd = {
+            "MAP": u1.number_input("SD of MAP [mmHg]", 0.0, 30.0, DEFAULT_SD["MAP"], 0.5, key="sim_sd_MAP"),
+            "Pbs": u2.number_input("SD of Pbs [mmHg]", 0.0, 10.0, DEFAULT_SD["Pbs"], 0.5, key="sim_sd_Pbs"),
+            "pi_gc": u3.number_input("SD of πgc [mmHg]", 0.0, 10.0, DEFAULT_SD["pi_gc"], 0.5, key="sim_sd_pi_gc"),
+            "Hct": u4.number_input("SD of Hct [%]", 0.0, 10.0, DEFAULT_SD["Hct"], 0.5, key="sim_sd_Hct"),
+        }
+        rho = st.slider("Correlation between MAP and Pbs errors", -0.9, 0.9, 0.0, 0.1, key="sim_rho_map_pbs")
+        st.caption("Bands are first-order: input covariance pushed through the model's Jacobian (no Monte Carlo).")
+
+    # ---------------- Compute ----------------
+    params = {k: st.session_state[k] for k in BASELINE.keys()}
+    out = compute_outputs(params)
+    band = propagate(params, sd, {("MAP", "Pbs"): rho}) if show_sd else {}
+
+    def _pm(name: str, unit: str) -> str:
+        text = f"{out[name]:.1f}"
+        if name in band:
+            text += f" ± {band[name][1]:.1f}"
+        return f"{text} {unit}"
+
+    # Keep ?sim= in step with the sliders.
+    st.session_state["_sim_token"] = encode(PARAM_FIELDS, params)
+    if st.query_params.get("sim") != st.session_state["_sim_token"]:
+        st.query_params["sim"] = st.session_state["_sim_token"]
+
+    instructor_panel("Parameter Simulator settings", params)
+
+    # ---------------- Results ----------------
+    st.markdown("### Calculated Results")
+    m1, m2, m3, m4, m5, m6 = st.columns(6)
+    m1.metric("GFR", _pm("GFR", "mL/min"))
+    m2.metric("RPF", _pm("RPF", "mL/min"))
+    m3.metric("RBF", f"{out['RBF']:.1f} mL/min")
+    m4.metric("FF", _pm("FF", "%"))
+    m5.metric("Pgc", f"{out['Pgc']:.1f} mmHg")
+    m6.metric("NFP", _pm("NFP", "mmHg"))
+
+def _adopt(params: dict):
+    """Load the broadcast parameters into the simulator sliders."""
+    st.session_state.update(params)
+
+if follow_toggle():
+    live_broadcast_panel(on_adopt=_adopt)
+else:
+    simulator_panel()
 
 st.divider()
 
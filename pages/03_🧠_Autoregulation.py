@@ -3,7 +3,8 @@ import streamlit as st
 import numpy as np
 import plotly.graph_objects as go
 from utils_nav import render_sidebar
-from physiology import autoregulated_values, rpf_from_map
+from physiology import autoregulated_curve, autoregulated_values, rpf_curve, rpf_from_map
+from sampling import adaptive_sample
 
 st.set_page_config(page_title="GFR — Autoregulation", layout="wide")
 render_sidebar()
@@ -21,17 +22,13 @@ with colA:
 with colB:
     map_min, map_max = st.slider("MAP range for analysis", 40, 220, (40, 220))
 
-MAPs = np.linspace(map_min, map_max, 60)
-GFRs, RPFs = [], []
+def no_autoregulation(MAP):
+    """Without autoregulation: simple proportional response, GFR tied loosely to RPF."""
+    r = rpf_curve(MAP, 1.0, 2.0)
+    return 0.18 * r, r
 
-for m in MAPs:
-    if use_auto:
-        g, r = autoregulated_values(m)
-    else:
-        # Without autoregulation: simple proportional response
-        r = rpf_from_map(m, 1.0, 2.0)
-        g = 0.18 * r  # tie GFR loosely to RPF
-    GFRs.append(g); RPFs.append(r)
+# Points are placed where the curves bend (80/180 mmHg corners), not on a fixed grid.
+MAPs, (GFRs, RPFs) = adaptive_sample(autoregulated_curve if use_auto else no_autoregulation, map_min, map_max)
 
 # Charts
 c1, c2 = st.columns(2)
@@ -51,27 +48,96 @@ with c2:
 
 st.divider()
 st.subheader("Interactive Point Analysis")
-MAP_point = st.slider("Select MAP for analysis", 40, 220, 100)
+animate = st.toggle(
+    "Animation mode (scrub MAP in the browser)", value=True,
+    help="All MAP points are computed once and sent as animation frames, so dragging the slider needs no server round-trips.",
+)
+
+@st.cache_data(show_spinner=False)
+def comparison_animation(use_auto: bool, map_lo: int = 40, map_hi: int = 220) -> dict:
+    """
+    Plotly figure dict: with/without-autoregulation curves plus one frame per MAP value.
+    With the toggle off, "with autoregulation" shows the unregulated values, as in the metrics view.
+    """
+    with_auto = autoregulated_curve if use_auto else no_autoregulation
+    grid = np.arange(map_lo, map_hi + 1, dtype=float)
+    g_auto, r_auto = with_auto(grid)
+    g_no, r_no = no_autoregulation(grid)
+
+    def title(i):
+        return (f"MAP {grid[i]:.0f} mmHg — with autoregulation: GFR {g_auto[i]:,.1f}, RPF {r_auto[i]:,.1f} mL/min"
+                f" · without: GFR {g_no[i]:,.1f}, RPF {r_no[i]:,.1f} mL/min")
+
+    def markers(i):
+        pt = lambda y, color: {"type": "scatter", "x": [grid[i]], "y": [y], "mode": "markers",
+                               "marker": {"size": 11, "color": color}, "showlegend": False}
+        return [pt(g_auto[i], "#1a73e8"), pt(g_no[i], "#d93025"), pt(r_auto[i], "#1a73e8"), pt(r_no[i], "#d93025")]
+
+    # Curves are sampled adaptively; only the scrubbing markers use the 1 mmHg grid.
+    x_auto, (cg_auto, cr_auto) = adaptive_sample(with_auto, map_lo, map_hi)
+    x_no, (cg_no, cr_no) = adaptive_sample(no_autoregulation, map_lo, map_hi)
 
-if use_auto:
-    g_auto, r_auto = autoregulated_values(MAP_point)
+    line = lambda x, y, name, color, axis, legend: {
+        "type": "scatter", "x": x.tolist(), "y": y.tolist(), "mode": "lines", "name": name,
+        "line": {"color": color}, "xaxis": f"x{axis}", "yaxis": f"y{axis}", "showlegend": legend,
+        "legendgroup": name,
+    }
+    start = int(np.searchsorted(grid, 100.0))
+    data = [
+        line(x_auto, cg_auto, "With autoregulation", "#1a73e8", "", True),
+        line(x_no, cg_no, "Without autoregulation", "#d93025", "", True),
+        line(x_auto, cr_auto, "With autoregulation", "#1a73e8", "2", False),
+        line(x_no, cr_no, "Without autoregulation", "#d93025", "2", False),
+    ]
+    for k, trace in enumerate(markers(start)):
+        trace.update({"xaxis": "x" if k < 2 else "x2", "yaxis": "y" if k < 2 else "y2"})
+        data.append(trace)
+
+    frames = [{"name": f"{m:.0f}", "data": markers(i), "traces": [4, 5, 6, 7],
+               "layout": {"title": {"text": title(i)}}} for i, m in enumerate(grid)]
+    step_args = {"mode": "immediate", "frame": {"duration": 0, "redraw": False}, "transition": {"duration": 0}}
+    layout = {
+        "title": {"text": title(start), "font": {"size": 14}},
+        "height": 460,
+        "xaxis": {"domain": [0, 0.46], "title": {"text": "MAP (mmHg)"}},
+        "yaxis": {"title": {"text": "GFR (mL/min)"}},
+        "xaxis2": {"domain": [0.54, 1], "title": {"text": "MAP (mmHg)"}},
+        "yaxis2": {"anchor": "x2", "title": {"text": "RPF (mL/min)"}},
+        "legend": {"orientation": "h", "y": 1.12},
+        "margin": {"t": 90},
+        "sliders": [{
+            "active": start,
+            "currentvalue": {"prefix": "Select MAP for analysis: ", "suffix": " mmHg"},
+            "pad": {"t": 50},
+            "steps": [{"label": f["name"], "method": "animate", "args": [[f["name"]], step_args]} for f in frames],
+        }],
+    }
+    return {"data": data, "layout": layout, "frames": frames}
+
+if animate:
+    st.plotly_chart(comparison_animation(use_auto), use_container_width=True)
 else:
-    r_auto = rpf_from_map(MAP_point, 1.0, 2.0)
-    g_auto = 0.18 * r_auto
-
-# Compare with “no autoregulation”
-r_no = rpf_from_map(MAP_point, 1.0, 2.0)
-g_no = 0.18 * r_no
-
-colx, coly = st.columns(2)
-with colx:
-    st.write("**With Autoregulation**")
-    st.metric("GFR", f"{g_auto:,.1f} mL/min")
-    st.metric("RPF", f"{r_auto:,.1f} mL/min")
-with coly:
-    st.write("**Without Autoregulation**")
-    st.metric("GFR", f"{g_no:,.1f} mL/min")
-    st.metric("RPF", f"{r_no:,.1f} mL/min")
+    MAP_point = st.slider("Select MAP for analysis", 40, 220, 100)
+
+    if use_auto:
+        g_auto, r_auto = autoregulated_values(MAP_point)
+    else:
+        r_auto = rpf_from_map(MAP_point, 1.0, 2.0)
+        g_auto = 0.18 * r_auto
+
+    # Compare with “no autoregulation”
+    r_no = rpf_from_map(MAP_point, 1.0, 2.0)
+    g_no = 0.18 * r_no
+
+    colx, coly = st.columns(2)
+    with colx:
+        st.write("**With Autoregulation**")
+        st.metric("GFR", f"{g_auto:,.1f} mL/min")
+        st.metric("RPF", f"{r_auto:,.1f} mL/min")
+    with coly:
+        st.write("**Without Autoregulation**")
+        st.metric("GFR", f"{g_no:,.1f} mL/min")
+        st.metric("RPF", f"{r_no:,.1f} mL/min")
 
 st.info(
     "✅ Within ~80–180 mmHg, **GFR** and **RPF** remain near-normal when autoregulation is active. "
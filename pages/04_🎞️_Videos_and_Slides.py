@@ -1,11 +1,45 @@
 import streamlit as st
 from utils_nav import render_sidebar
 from pathlib import Path
+from media import build_variants, responsive_img_html, warm_youtube_thumbnails, youtube_thumbnail
 
 # ---------------- CONFIG ---------------- #
 st.set_page_config(page_title="GFR — Videos & Slides", layout="wide")
 render_sidebar()
 
+VIDEOS = {
+    "lecture-1": "https://www.youtube.com/watch?v=SVqSqPOcahY&t=1321s",
+    "lecture-2": "https://youtu.be/8Mn0IUCTg3U?si=k0_nwQowIMuMFKvY",
+    "advanced": "https://youtu.be/ONWfkprMOps",
+    "podcast": "https://youtu.be/aGn9IAsFqj8",
+}
+mindmap_path = Path("assets/NotebookLM Mind Map-GFR.png")
+
+# ---------------- MEDIA CACHE ---------------- #
+@st.cache_resource(show_spinner=False)
+def prepare_media() -> dict:
+    """Build image variants once per server process; thumbnails are cached in the background."""
+    warm_youtube_thumbnails(list(VIDEOS.values()))
+    return {"mindmap": build_variants(mindmap_path) if mindmap_path.exists() else None}
+
+media = prepare_media()
+
+def video_slot(key: str, caption: str):
+    """Thumbnail + play button; the YouTube player only loads once clicked."""
+    url = VIDEOS[key]
+    if st.session_state.get(f"play_{key}"):
+        st.video(url)
+    else:
+        st.markdown(
+            f'<img src="{youtube_thumbnail(url)}" alt="{caption}" loading="lazy" '
+            'style="width:100%;aspect-ratio:16/9;object-fit:cover;border-radius:10px;"/>',
+            unsafe_allow_html=True,
+        )
+        if st.button("▶️ Play video", key=f"btn_{key}", use_container_width=True):
+            st.session_state[f"play_{key}"] = True
+            st.rerun()
+    st.markdown(f"<p style='text-align:center;'>{caption}</p>", unsafe_allow_html=True)
+
 # ---------------- HEADER ---------------- #
 st.title("🎞️ GFR Videos & Slides")
 
@@ -15,12 +49,10 @@ st.markdown("### 🎬 Lecture Videos")
 col1, col2 = st.columns(2)  # Two videos side by side
 
 with col1:
-    st.video("https://www.youtube.com/watch?v=SVqSqPOcahY&t=1321s")
-    st.markdown("<p style='text-align:center;'>Video 1: GFR Lecture Part 1</p>", unsafe_allow_html=True)
+    video_slot("lecture-1", "Video 1: GFR Lecture Part 1")
 
 with col2:
-    st.video("https://youtu.be/8Mn0IUCTg3U?si=k0_nwQowIMuMFKvY")
-    st.markdown("<p style='text-align:center;'>Video 2: GFR Lecture Part 2</p>", unsafe_allow_html=True)
+    video_slot("lecture-2", "Video 2: GFR Lecture Part 2")
 
 # ───────────────────────────────────────────────
 # 🎧 Podcast Section
@@ -55,13 +87,11 @@ col3, col4 = st.columns(2)
 
 # --- Additional Teaching Video ---
 with col3:
-    st.video("https://youtu.be/ONWfkprMOps")   # replace with your video URL
-    st.markdown("<p style='text-align:center;'>Supplementary Video — Advanced GFR Concepts</p>", unsafe_allow_html=True)
+    video_slot("advanced", "Supplementary Video — Advanced GFR Concepts")
 
 # --- Podcast as Video ---
 with col4:
-    st.video("https://youtu.be/aGn9IAsFqj8")  # replace with your podcast YouTube link
-    st.markdown("<p style='text-align:center;'>🎧 GFR Podcast — Clinical Relevance Discussion</p>", unsafe_allow_html=True)
+    video_slot("podcast", "🎧 GFR Podcast — Clinical Relevance Discussion")
 
 st.caption("Both resources are unlisted on YouTube and accessible for educational use. These were created using NotebookLM. You may watch either before class for reinforcement or revision.")
 
@@ -72,10 +102,9 @@ st.caption("Both resources are unlisted on YouTube and accessible for educationa
 st.divider()
 st.subheader("🧠 Mind Map — Conceptual Overview of GFR")
 
-mindmap_path = Path("assets/NotebookLM Mind Map-GFR.png")
-
-if mindmap_path.exists():
-    st.image(mindmap_path, caption="NotebookLM: Conceptual Mind Map of GFR Regulation", use_container_width=True)
+if media["mindmap"]:
+    st.markdown(responsive_img_html(media["mindmap"], alt="NotebookLM: Conceptual Mind Map of GFR Regulation"), unsafe_allow_html=True)
+    st.caption("NotebookLM: Conceptual Mind Map of GFR Regulation")
     st.caption("This visual integrates Starling forces, autoregulation, and clinical implications of GFR.")
 else:
     st.warning("Mind map image not found in assets/. Please ensure 'NotebookLM Mind Map-GFR.png' is uploaded.")
@@ -1,5 +1,13 @@
 import streamlit as st
 import random
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from physiology import compute_outputs
+from vascular import POPULATIONS, nephron_population, single_nephron_gfr, stenosis_case, stenosis_outputs
+from clearance import ANSWER_COLUMNS, RECORD_COLUMNS, clearance_table, example_records, grade
+from state_codec import Choice, Quantized, encode, quantize, try_decode
 
 try:
     from utils_nav import render_sidebar
@@ -18,110 +26,222 @@ You can **generate random cases** to solve!
 # --------------------------------------------------
 # Function to simulate physiology
 # --------------------------------------------------
+CASE_TYPES = [
+    "Afferent Arteriolar Constriction",
+    "Efferent Arteriolar Constriction",
+    "Dehydration",
+    "ACE Inhibitor Effect",
+    "Acute Urinary Obstruction",
+    "Early Diabetic Nephropathy",
+    "Renal Artery Stenosis",
+]
+
+# Case inputs on a fixed grid so a case round-trips exactly through ?case=
+# (calibrated model scale, same as the simulator: Kf in mL/min/mmHg, Hct in %)
+CASE_FIELDS = (
+    Choice("case", tuple(CASE_TYPES)),
+    Quantized("MAP", 70.0, 110.0, 0.1),
+    Quantized("Ra", 0.8, 2.0, 0.01),
+    Quantized("Re", 0.8, 2.5, 0.01),
+    Quantized("Pbs", 8.0, 14.0, 0.1),
+    Quantized("pi_gc", 22.0, 28.0, 0.1),
+    Quantized("Kf", 5.0, 7.0, 0.01),
+    Quantized("Hct", 38.0, 48.0, 0.1),
+    Quantized("stenosis", 0.0, 90.0, 1.0),   # % renal artery diameter reduction
+)
+
+def derive_case(c: dict) -> dict:
+    """Derived pressures and flows from the calibrated model, downstream of any renal artery stenosis."""
+    if c.get("stenosis", 0.0) > 0:
+        return {**c, **stenosis_case(c, stenosis=c["stenosis"])}
+    return {**c, **compute_outputs(c)}
+
 def simulate_case():
     """Generate random but physiologically realistic renal parameters"""
-    case_types = [
-        "Afferent Arteriolar Constriction",
-        "Efferent Arteriolar Constriction",
-        "Dehydration",
-        "ACE Inhibitor Effect",
-        "Acute Urinary Obstruction",
-        "Early Diabetic Nephropathy",
-        "Renal Artery Stenosis",
-    ]
-    case = random.choice(case_types)
+    case = random.choice(CASE_TYPES)
 
     # Physiological ranges
-    MAP = random.uniform(70, 110)
-    Ra = random.uniform(0.8, 2.0)
-    Re = random.uniform(0.8, 2.5)
-    Pbs = random.uniform(10, 18)
-    pi_gc = random.uniform(25, 32)
-    Kf = random.uniform(10, 14)
-    Hct = random.uniform(0.38, 0.48)
-
-    # Derived pressures and flows (simplified physiological relationships)
-    Pgc = MAP * (Re / (Ra + Re)) + 10
-    NFP = Pgc - Pbs - pi_gc
-    GFR = max(0, Kf * NFP)
-    RPF = (MAP / (Ra + Re)) * 120
-    RBF = RPF / (1 - Hct)
-    FF = (GFR / RPF) * 100 if RPF else 0
-
-    return {
-        "case": case,
-        "MAP": MAP,
-        "Ra": Ra,
-        "Re": Re,
-        "Pbs": Pbs,
-        "pi_gc": pi_gc,
-        "Kf": Kf,
-        "Hct": Hct,
-        "Pgc": Pgc,
-        "NFP": NFP,
-        "GFR": GFR,
-        "RPF": RPF,
-        "RBF": RBF,
-        "FF": FF,
-    }
+    inputs = {"case": case}
+    for f in CASE_FIELDS[1:]:
+        inputs[f.name] = random.uniform(f.lo, f.hi)
+    inputs["stenosis"] = random.uniform(60, 80) if case == "Renal Artery Stenosis" else 0.0
+    return derive_case(quantize(CASE_FIELDS, inputs))
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def stenosis_sweep(c: dict, population: str, n_units: int, cv: float, Re: float) -> dict:
+    """Whole-kidney outputs for 0–90 % stenosis (one batched network solve per call to ``stenosis_outputs``)."""
+    pop = nephron_population(n_units, POPULATIONS[population], cv=cv)
+    grid = np.arange(0.0, 91.0, 2.0)
+    out = stenosis_outputs({**c, "Re": Re}, stenosis=grid, population=pop)
+    return {"stenosis": grid, **{k: out[k] for k in ("GFR", "RPF", "P_artery", "FF")}}
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def unit_snapshot(c: dict, population: str, n_units: int, cv: float, Re: float, stenosis: float) -> dict:
+    """Single-nephron GFR of every unit (and its group label) at this case's stenosis."""
+    pop = nephron_population(n_units, POPULATIONS[population], cv=cv)
+    out = stenosis_outputs({**c, "Re": Re}, stenosis=stenosis, population=pop)
+    labels = np.array([g.label for g in POPULATIONS[population]])
+    return {"SNGFR": single_nephron_gfr(out)[0], "group": labels[pop["group"]], "GFR": float(out["GFR"][0])}
+
+def stenosis_explorer(c: dict):
+    """Interactive network view of the Renal Artery Stenosis case."""
+    with st.expander("🔬 Stenosis explorer (segmental vascular network)", expanded=True):
+        st.caption(
+            "Renal artery → afferent → glomerulus → efferent → peritubular capillaries, with the kidney "
+            "split into parallel nephron units. Try raising efferent tone (angiotensin II) and then lowering it (ACE inhibitor)."
+        )
+        e1, e2, e3, e4 = st.columns(4)
+        population = e1.selectbox("Nephron population", list(POPULATIONS), key="ras_population")
+        n_units = e2.select_slider("Nephron units", [100, 250, 500, 1000, 2000], value=500, key="ras_units")
+        cv = e3.slider("Unit-to-unit variability (CV)", 0.0, 0.5, 0.2, 0.05, key="ras_cv")
+        Re = e4.slider("Efferent resistance (Re)", 0.5, 6.0, float(round(c["Re"], 1)), 0.1, key="ras_Re")
+        inputs = {k: c[k] for k in ("MAP", "Ra", "Pbs", "Kf", "pi_gc", "Hct")}
+        sweep = stenosis_sweep(inputs, population, n_units, cv, Re)
+        units = unit_snapshot(inputs, population, n_units, cv, Re, c["stenosis"])
+
+        fig = go.Figure()
+        fig.add_scatter(x=sweep["stenosis"], y=sweep["GFR"], name="GFR (mL/min)")
+        fig.add_scatter(x=sweep["stenosis"], y=sweep["RPF"] / 5.0, name="RPF ÷ 5 (mL/min)")
+        fig.add_scatter(x=sweep["stenosis"], y=sweep["P_artery"], name="Post-stenotic pressure (mmHg)", line=dict(dash="dot"))
+        fig.add_vline(x=c["stenosis"], line=dict(dash="dash"), annotation_text="This case")
+        fig.update_layout(xaxis_title="Renal artery stenosis (% diameter)", height=380,
+                          legend=dict(orientation="h", y=1.15), margin=dict(t=40))
+
+        hist = go.Figure()
+        for label in dict.fromkeys(units["group"]):
+            hist.add_histogram(x=units["SNGFR"][units["group"] == label], name=label, opacity=0.75, nbinsx=40)
+        hist.update_layout(barmode="overlay", xaxis_title="Single-nephron GFR at this stenosis (nL/min)",
+                           yaxis_title="Nephron units", height=380, legend=dict(orientation="h", y=1.15), margin=dict(t=40))
+
+        g1, g2 = st.columns(2)
+        g1.plotly_chart(fig, use_container_width=True)
+        g2.plotly_chart(hist, use_container_width=True)
+        st.caption(f"Whole-kidney GFR with this nephron population and Re: {units['GFR']:.1f} mL/min "
+                   f"(case, homogeneous kidney: {c['GFR']:.1f} mL/min).")
+
+# A shared ?case= link (or another replica) restores the case without session state.
+_token = st.query_params.get("case")
+if _token and _token != st.session_state.get("_case_token"):
+    _url_case = try_decode(CASE_FIELDS, _token)
+    if _url_case:
+        st.session_state["case"] = derive_case(_url_case)
+        st.session_state["_case_token"] = _token
+
+tab_cases, tab_lab = st.tabs(["🎲 Random Cases", "🧫 Clearance Lab"])
+
+with tab_cases:
+    # --------------------------------------------------
+    # Random Case Generator UI
+    # --------------------------------------------------
+    st.subheader("🎲 Generate a Random Case")
+
+    if st.button("🔁 Generate Case", use_container_width=True):
+        case = simulate_case()
+        st.session_state["case"] = case
+        st.session_state["_case_token"] = encode(CASE_FIELDS, case)
+        st.query_params["case"] = st.session_state["_case_token"]
+
+    if "case" in st.session_state:
+        c = st.session_state["case"]
+        st.markdown(f"### **Case Type:** {c['case']}")
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Mean Arterial Pressure (MAP)", f"{c['MAP']:.1f} mmHg")
+            st.metric("Bowman's Capsule Pressure (Pbs)", f"{c['Pbs']:.1f} mmHg")
+        with col2:
+            st.metric("Afferent Resistance (Ra)", f"{c['Ra']:.2f} rel units")
+            st.metric("Efferent Resistance (Re)", f"{c['Re']:.2f} rel units")
+        with col3:
+            st.metric("Oncotic Pressure (πgc)", f"{c['pi_gc']:.1f} mmHg")
+            st.metric("Ultrafiltration Coefficient (Kf)", f"{c['Kf']:.2f}")
+        if c.get("stenosis", 0.0) > 0:
+            s1, s2 = st.columns(2)
+            s1.metric("Renal Artery Stenosis", f"{c['stenosis']:.0f} % diameter")
+            s2.metric("Post-stenotic Renal Artery Pressure", f"{c['P_artery']:.1f} mmHg")
+
+        st.markdown("---")
+        st.markdown("### 🧮 Derived Results")
+        colA, colB, colC = st.columns(3)
+        with colA:
+            st.metric("Glomerular Pressure (Pgc)", f"{c['Pgc']:.1f} mmHg")
+            st.metric("Net Filtration Pressure (NFP)", f"{c['NFP']:.1f} mmHg")
+        with colB:
+            st.metric("GFR", f"{c['GFR']:.1f} mL/min")
+            st.metric("Filtration Fraction (FF)", f"{c['FF']:.1f}%")
+        with colC:
+            st.metric("RPF", f"{c['RPF']:.1f} mL/min")
+            st.metric("RBF", f"{c['RBF']:.1f} mL/min")
+
+        st.caption("All parameters are within realistic physiological or mild pathological ranges.")
+        if c.get("stenosis", 0.0) > 0:
+            stenosis_explorer(c)
+
+        st.markdown("---")
+        st.subheader("💬 Reflective Questions")
+
+        st.markdown(
+            f"""
+    1. Based on the parameters, describe how this case (“**{c['case']}**”) affects renal hemodynamics.  
+    2. Which Starling force is primarily altered (Pgc, Pbs, or πgc)?  
+    3. How does this change influence **NFP** and **GFR**?  
+    4. Predict what happens to **RPF** and **FF** and explain physiologically.  
+    5. Suggest one **clinical condition or drug** that could cause a similar pattern.
+    """
+        )
+        st.text_area("🧠 Your Explanation:", height=150, key="reflection")
+
+        st.success("✅ Tip: Compare your reasoning with simulator data on the other tabs!")
+
+    else:
+        st.info("Click **🔁 Generate Case** to create a random physiological scenario.")
 
 # --------------------------------------------------
-# Random Case Generator UI
+# Clearance Lab (timed-urine worksheet)
 # --------------------------------------------------
-st.subheader("🎲 Generate a Random Case")
-
-if st.button("🔁 Generate Case", use_container_width=True):
-    case = simulate_case()
-    st.session_state["case"] = case
-
-if "case" in st.session_state:
-    c = st.session_state["case"]
-    st.markdown(f"### **Case Type:** {c['case']}")
-
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.metric("Mean Arterial Pressure (MAP)", f"{c['MAP']:.1f} mmHg")
-        st.metric("Bowman's Capsule Pressure (Pbs)", f"{c['Pbs']:.1f} mmHg")
-    with col2:
-        st.metric("Afferent Resistance (Ra)", f"{c['Ra']:.2f} rel units")
-        st.metric("Efferent Resistance (Re)", f"{c['Re']:.2f} rel units")
-    with col3:
-        st.metric("Oncotic Pressure (πgc)", f"{c['pi_gc']:.1f} mmHg")
-        st.metric("Ultrafiltration Coefficient (Kf)", f"{c['Kf']:.2f}")
-
-    st.markdown("---")
-    st.markdown("### 🧮 Derived Results")
-    colA, colB, colC = st.columns(3)
-    with colA:
-        st.metric("Glomerular Pressure (Pgc)", f"{c['Pgc']:.1f} mmHg")
-        st.metric("Net Filtration Pressure (NFP)", f"{c['NFP']:.1f} mmHg")
-    with colB:
-        st.metric("GFR", f"{c['GFR']:.1f} mL/min")
-        st.metric("Filtration Fraction (FF)", f"{c['FF']:.1f}%")
-    with colC:
-        st.metric("RPF", f"{c['RPF']:.1f} mL/min")
-        st.metric("RBF", f"{c['RBF']:.1f} mL/min")
-
-    st.caption("All parameters are within realistic physiological or mild pathological ranges.")
-
-    st.markdown("---")
-    st.subheader("💬 Reflective Questions")
-
+with tab_lab:
+    st.subheader("🧫 Clearance Lab — Timed Urine Collections")
     st.markdown(
-        f"""
-1. Based on the parameters, describe how this case (“**{c['case']}**”) affects renal hemodynamics.  
-2. Which Starling force is primarily altered (Pgc, Pbs, or πgc)?  
-3. How does this change influence **NFP** and **GFR**?  
-4. Predict what happens to **RPF** and **FF** and explain physiologically.  
-5. Suggest one **clinical condition or drug** that could cause a similar pattern.
+        """
+**Clearance = (U × V) / P** — inulin clearance measures **GFR**, creatinine clearance estimates it,
+and PAH clearance gives **effective RPF**. **FF = GFR / eRPF × 100**.
+
+Upload a CSV with one row per student/record (or use the example batch) to compute and grade a whole lab section at once.
 """
     )
-    st.text_area("🧠 Your Explanation:", height=150, key="reflection")
-
-    st.success("✅ Tip: Compare your reasoning with simulator data on the other tabs!")
 
-else:
-    st.info("Click **🔁 Generate Case** to create a random physiological scenario.")
+    with st.expander("📄 Expected columns", expanded=False):
+        st.table(pd.DataFrame({"Column": list(RECORD_COLUMNS), "Meaning": list(RECORD_COLUMNS.values())}))
+        st.caption(
+            "Optional answer columns for grading: "
+            + ", ".join(f"`{a}` (vs {c})" for c, a in ANSWER_COLUMNS.items())
+        )
+
+    upload = st.file_uploader("Lab records (CSV)", type=["csv"])
+    records = pd.read_csv(upload) if upload is not None else example_records()
+    if upload is None:
+        st.caption("Showing a synthetic example section — upload your own CSV to replace it.")
+
+    tol = st.slider("Grading tolerance (± %)", 1, 20, 5, 1)
+    results = grade(clearance_table(records), tolerance=tol / 100.0)
+
+    shown = [c for c in ("student", "V", "GFR_inulin", "CrCl", "eRPF", "eRBF", "FF", "score") if c in results]
+    st.dataframe(results[shown].round(2), use_container_width=True, hide_index=True)
+
+    k1, k2, k3, k4 = st.columns(4)
+    k1.metric("Records", f"{len(results)}")
+    k2.metric("Mean inulin GFR", f"{results['GFR_inulin'].mean():.1f} mL/min")
+    k3.metric("Mean eRPF", f"{results['eRPF'].mean():.1f} mL/min")
+    k4.metric("Mean FF", f"{results['FF'].mean():.1f} %")
+
+    st.download_button(
+        "⬇️ Download results (CSV)",
+        data=results.to_csv(index=False).encode("utf-8"),
+        file_name="gfr_clearance_lab_results.csv",
+        mime="text/csv",
+        use_container_width=True,
+    )
+    st.caption("Creatinine clearance usually runs ~10–20% above inulin clearance because creatinine is also secreted by the proximal tubule.")
 
 st.divider()
 st.caption("Built for renal physiology learning — each case uses realistic GFR and RPF ranges.")
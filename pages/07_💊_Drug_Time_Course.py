@@ -0,0 +1,179 @@
+# pages/07_💊_Drug_Time_Course.py
+import hashlib
+import re
+import uuid
+
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+from jobs import get_runner
+from model_spec import GFR_MODEL
+from pharmacology import DRUGS, cohort_kernel, patient_summary, percentile_bands, sample_cohort, simulate_time_course
+from result_store import ResultStore
+from utils_nav import fragment, render_sidebar
+
+st.set_page_config(page_title="GFR — Drug Time Course", layout="wide")
+render_sidebar()
+
+st.title("💊 Drug Time Course")
+st.caption("Simulate how an ACE inhibitor, an NSAID or an angiotensin II infusion changes GFR and FF over days in a virtual cohort.")
+
+# Cohorts above this size go to the background process pool.
+INLINE_LIMIT = 20_000
+JOB_POLL = "0.5s"
+RESULTS_DIR = "results"
+
+# ---------------- Controls ----------------
+c1, c2, c3, c4 = st.columns(4)
+drug_name = c1.selectbox("Drug", list(DRUGS.keys()), index=0)
+n_patients = c2.select_slider("Virtual patients", [100, 1_000, 5_000, 20_000, 50_000, 100_000], value=5_000)
+days = c3.slider("Duration (days)", 1, 7, 3)
+cv = c4.slider("Between-patient variability (CV %)", 0, 30, 10, 1)
+seed = 7
+
+drug = DRUGS[drug_name]
+st.info(f"**{drug.name}** — {drug.note}")
+
+# ---------------- Simulate ----------------
+@st.cache_data(show_spinner=False, max_entries=16)
+def run_inline(drug_name: str, n: int, hours: float, cv: float, seed: int) -> dict:
+    cohort = sample_cohort(n, seed=seed, cv=cv)
+    res = simulate_time_course(DRUGS[drug_name], cohort, hours=hours)
+    return {"t": res["t"], "GFR": percentile_bands(res["GFR"]), "FF": percentile_bands(res["FF"]),
+            "patients": patient_summary(res["GFR"], res["FF"])}
+
+def _submit(drug_name: str, n: int, hours: float, cv: float, seed: int, key: str) -> str:
+    """Sample the cohort and queue it, forgetting this session's previous job."""
+    runner = get_runner()
+    old = st.session_state.get("drug_job")
+    if old is not None and old[0] != key:
+        runner.forget(old[1])
+    st.session_state.setdefault("job_slot", uuid.uuid4().hex)
+    job_id = runner.submit(
+        cohort_kernel,
+        sample_cohort(n, seed=seed, cv=cv),
+        {"GFR": ((n, int(hours) + 1), "f8"), "FF": ((n, int(hours) + 1), "f8")},
+        params={"drug_name": drug_name, "hours": hours},
+        chunk_size=10_000,
+        slot=f"drug-course:{st.session_state['job_slot']}",
+        key=key,
+    )
+    st.session_state["drug_job"] = (key, job_id)
+    return job_id
+
+@fragment(run_every=JOB_POLL)
+def job_progress(job_id: str, n: int):
+    """Polls the job on its own; one full rerun once it has finished."""
+    status = get_runner().status(job_id)
+    if status.state in ("done", "failed"):
+        st.rerun()
+    st.progress(status.progress, text=f"Simulating {n:,} patients… {status.progress:.0%}")
+
+def run_background(drug_name: str, n: int, hours: float, cv: float, seed: int, key: str):
+    """Cached result, or submit/poll the cohort job and stop the page until it is done."""
+    runner = get_runner()
+    out = runner.cached(key)
+    if out is None:
+        job = st.session_state.get("drug_job")
+        try:
+            status = runner.status(job[1]) if job and job[0] == key else None
+        except KeyError:  # forgotten by the runner
+            status = None
+        if status is None or status.state == "cancelled":
+            status = runner.status(_submit(drug_name, n, hours, cv, seed, key))
+        if status.state == "failed":
+            st.error(f"Simulation failed: {status.error}")
+            st.stop()
+        if status.state != "done":
+            job_progress(status.job_id, n)
+            st.stop()
+        out = runner.result(status.job_id)
+    return {"t": np.arange(int(hours) + 1, dtype=float), "GFR": percentile_bands(out["GFR"]), "FF": percentile_bands(out["FF"]),
+            "patients": patient_summary(out["GFR"], out["FF"])}
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def store_patients(key: str, _patients: dict, drug_name: str, hours: float, cv: float, seed: int) -> str:
+    """Write a run's per-patient summary to the result store once; returns the dataset name."""
+    store = ResultStore(RESULTS_DIR)
+    name = re.sub(r"[^A-Za-z0-9.]+", "-", key).strip("-")
+    try:
+        store.open(name)
+        return name
+    except FileNotFoundError:
+        pass
+    try:
+        writer = store.create(name, {c: "f4" for c in _patients}, chunk_rows=10_000,
+                              params={"drug": drug_name, "hours": hours, "cv": cv}, seed=seed,
+                              model_version=hashlib.sha256(GFR_MODEL.source.encode()).hexdigest()[:12])
+    except FileExistsError:  # written meanwhile by another worker process
+        return name
+    writer.append(_patients)
+    writer.close()
+    return name
+
+hours = 24.0 * days
+run_key = f"drug-course:{drug_name}:{n_patients}:{hours}:{cv / 100.0}:{seed}"
+if n_patients <= INLINE_LIMIT:
+    with st.spinner("Simulating cohort…"):
+        bands = run_inline(drug_name, n_patients, hours, cv / 100.0, seed)
+else:
+    bands = run_background(drug_name, n_patients, hours, cv / 100.0, seed, run_key)
+
+# ---------------- Charts ----------------
+def band_figure(t, b, title, y_title, ref=None, ref_text=""):
+    fig = go.Figure()
+    fig.add_scatter(x=t, y=b[95], mode="lines", line=dict(width=0), showlegend=False, hoverinfo="skip")
+    fig.add_scatter(x=t, y=b[5], mode="lines", line=dict(width=0), fill="tonexty",
+                    fillcolor="rgba(26,115,232,0.15)", name="5–95th pct")
+    fig.add_scatter(x=t, y=b[75], mode="lines", line=dict(width=0), showlegend=False, hoverinfo="skip")
+    fig.add_scatter(x=t, y=b[25], mode="lines", line=dict(width=0), fill="tonexty",
+                    fillcolor="rgba(26,115,232,0.30)", name="25–75th pct")
+    fig.add_scatter(x=t, y=b[50], mode="lines", line=dict(color="#1a73e8"), name="Median")
+    if ref is not None:
+        fig.add_hline(y=ref, line=dict(dash="dash"), annotation_text=ref_text)
+    fig.update_layout(title=title, xaxis_title="Time (h)", yaxis_title=y_title, height=380)
+    return fig
+
+t = bands["t"]
+c1, c2 = st.columns(2)
+with c1:
+    st.plotly_chart(band_figure(t, bands["GFR"], "GFR over time", "GFR (mL/min)", 120, "Normal GFR ≈ 120"), use_container_width=True)
+with c2:
+    st.plotly_chart(band_figure(t, bands["FF"], "Filtration fraction over time", "FF (%)", 20, "Normal FF ≈ 20%"), use_container_width=True)
+
+g50, f50 = bands["GFR"][50], bands["FF"][50]
+m1, m2, m3, m4 = st.columns(4)
+m1.metric("Median GFR at start", f"{g50[0]:.1f} mL/min")
+m2.metric("Median GFR at end", f"{g50[-1]:.1f} mL/min", f"{g50[-1] - g50[0]:+.1f}")
+m3.metric("Lowest median GFR", f"{g50.min():.1f} mL/min", f"at {t[int(np.argmin(g50))]:.0f} h", delta_color="off")
+m4.metric("Median FF at end", f"{f50[-1]:.1f} %", f"{f50[-1] - f50[0]:+.1f}")
+
+# ---------------- Patient query ----------------
+with st.expander("🔎 Find virtual patients", expanded=False):
+    try:
+        patients = ResultStore(RESULTS_DIR).open(
+            store_patients(run_key, bands["patients"], drug_name, hours, cv / 100.0, seed))
+    except OSError as e:
+        st.warning(f"Result store unavailable: {e}")
+    else:
+        where = st.text_input("Condition", "GFR_end < 90",
+                              help="`column <op> number`, joined by `and`. Columns: " + ", ".join(patients.columns))
+        try:
+            hits = patients.query(where, limit=500)
+            n_hits = patients.count(where)
+        except (ValueError, KeyError) as e:
+            st.warning(str(e))
+        else:
+            st.caption(f"{n_hits:,} of {patients.n_rows:,} patients match · read "
+                       f"{patients.last_scan['scanned']} of {patients.last_scan['chunks']} chunks")
+            st.dataframe(hits.round(2), use_container_width=True, hide_index=True)
+
+st.divider()
+with st.expander("🧠 Teaching Notes", expanded=False):
+    st.markdown("""
+- **ACE inhibitor** → ↓angiotensin II → **efferent dilation (↓Re)** → ↓Pgc but ↑RPF → **FF falls**; GFR dips slightly.
+- **NSAID** → ↓vasodilator prostaglandins → **afferent constriction (↑Ra)** → ↓RPF and ↓GFR, most marked when perfusion depends on prostaglandins.
+- **Angiotensin II** → **efferent > afferent constriction** and mesangial contraction (↓Kf) → RPF falls more than GFR → **FF rises**.
+- Bands show the spread across virtual patients (5–95th and 25–75th percentiles); doses repeat at the usual interval.
+""")
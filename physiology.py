@@ -1,31 +1,30 @@
 # physiology.py
 import numpy as np
 
-# --- Starling forces and core metrics ---
-def nfp(Pgc: float, Pbs: float, pi_gc: float, pi_bs: float = 0.0) -> float:
-    """Net Filtration Pressure in mmHg."""
-    return (Pgc - Pbs) - (pi_gc - pi_bs)
+from model_spec import GFR_MODEL
 
-def gfr(Kf: float, nfp_val: float) -> float:
-    """GFR in mL/min from Kf (mL/min/mmHg) and NFP (mmHg)."""
-    return max(0.0, Kf * max(0.0, nfp_val))
+# --- Calibrated model (defined once in model_spec) ---
+BASELINE = dict(GFR_MODEL.defaults)
 
-def rpf_from_map(MAP: float, Ra: float, Re: float) -> float:
-    """
-    Very simple hemodynamic model:
-    RPF ∝ MAP / (Ra + Re). Scaled to ~650 mL/min at MAP=100, Ra=1, Re=2.
-    """
-    scale = 650.0
-    baseline = 100.0 / (1.0 + 2.0)
-    return max(0.0, scale * (MAP / (Ra + Re)) / baseline)
+def compute_outputs(p: dict) -> dict:
+    """GFR, RPF, RBF, FF, Pgc and NFP for one parameter set (missing keys take baseline values)."""
+    return GFR_MODEL.compute(p)
 
-def rbf_from_rpf(RPF: float, Hct: float) -> float:
-    """RBF = RPF / (1 - Hct). Hct in percent."""
-    frac = max(0.01, 1.0 - (Hct / 100.0))
-    return RPF / frac
+# Teaching scenarios (parameter dicts on the calibrated scale)
+DEFAULT_SCENARIOS = {
+    "Normal": {**BASELINE},
+    "Increased Ra": {**BASELINE, "Ra": 2.5},          # Afferent constriction -> ↓RPF, ↓Pgc -> ↓GFR, ↓FF
+    "Mild Re Increase": {**BASELINE, "Re": 3.5},      # Mild efferent constriction -> ↑Pgc, ↓RPF -> FF↑ (GFR ≈ preserved)
+    "Severe Re Increase": {**BASELINE, "Re": 5.0},    # Strong efferent constriction -> Pgc↑ a lot, RPF↓ -> FF↑↑
+    "Decreased Kf": {**BASELINE, "Kf": 3.0},          # Filter coefficient drop -> ↓GFR even if pressures ok
+    "Increased Bowman": {**BASELINE, "Pbs": 25.0},    # Obstruction -> backpressure -> ↓NFP -> ↓GFR
+    "Decreased MAP": {**BASELINE, "MAP": 70.0},       # Hypotension -> ↓Pgc, ↓RPF -> ↓GFR
+}
 
-def filtration_fraction(GFR: float, RPF: float) -> float:
-    return 0.0 if RPF <= 0 else 100.0 * (GFR / RPF)
+# --- Pressure-driven renal plasma flow ---
+def rpf_from_map(MAP: float, Ra: float, Re: float) -> float:
+    """RPF (mL/min) from the calibrated model; ~650 mL/min at MAP=100, Ra=1, Re=2."""
+    return max(0.0, GFR_MODEL.compute({"MAP": MAP, "Ra": Ra, "Re": Re})["RPF"])
 
 # --- Autoregulation toy model (flat plateau ~80–180 mmHg) ---
 def autoregulated_values(MAP: float):
@@ -41,3 +40,14 @@ def autoregulated_values(MAP: float):
         k = 1.0 + 0.5 * ((MAP - 180) / 40.0)  # gentle rise out of range
         return (120.0 * k, 650.0 * k)
     return (120.0, 650.0)
+
+def autoregulated_curve(MAP):
+    """Vectorized autoregulated_values: (GFR_auto, RPF_auto) arrays for an array of MAPs."""
+    MAP = np.asarray(MAP, dtype=float)
+    k = np.where(MAP < 80, MAP / 80.0,
+                 np.where(MAP > 180, 1.0 + 0.5 * ((MAP - 180) / 40.0), 1.0))
+    return 120.0 * k, 650.0 * k
+
+def rpf_curve(MAP, Ra: float, Re: float):
+    """Vectorized rpf_from_map over an array of MAPs."""
+    return np.maximum(0.0, GFR_MODEL.batch({"MAP": MAP, "Ra": Ra, "Re": Re})["RPF"])
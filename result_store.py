@@ -0,0 +1,231 @@
+# result_store.py
+"""
+Out-of-core columnar store for large simulation outputs (sweeps, cohorts,
+time courses).
+
+A dataset is a directory with one raw little-endian file per column
+(``GFR.bin`` …) that is read back through ``np.memmap``, plus ``meta.json``
+holding the row count, chunk size, per-chunk min/max of every column (zone
+maps) and provenance: parameter ranges, seed and model version.
+
+Predicate queries such as ``"GFR < 60 and FF > 25"`` consult the zone maps
+first and never touch chunks that cannot match, so charting a slice of a
+10⁸-row result reads only the chunks it needs. As with SQL NULL, a NaN value
+satisfies no condition (not even ``!=``), so results don't depend on chunking.
+"""
+import json
+import operator
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+_OPS = {
+    "<": operator.lt, "<=": operator.le, ">": operator.gt,
+    ">=": operator.ge, "==": operator.eq, "!=": operator.ne,
+}
+_TERM = re.compile(r"^\s*([A-Za-z_]\w*)\s*(<=|>=|==|!=|<|>)\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*$")
+
+
+# --- Predicates ---
+def parse_predicate(where: str) -> list:
+    """``"GFR < 60 and FF > 25"`` → ``[("GFR", "<", 60.0), ("FF", ">", 25.0)]``."""
+    terms = []
+    for part in re.split(r"\s+and\s+|\s*&\s*", where.strip(), flags=re.IGNORECASE):
+        m = _TERM.match(part)
+        if not m:
+            raise ValueError(f"Cannot parse condition {part!r}; use 'column <op> number' joined by 'and'.")
+        terms.append((m.group(1), m.group(2), float(m.group(3))))
+    return terms
+
+def _chunk_may_match(lo: float, hi: float, op: str, v: float) -> bool:
+    """Can any value in [lo, hi] satisfy ``x op v``? (NaN bounds = all-NaN chunk, which never matches)."""
+    if np.isnan(lo):
+        return False
+    return {
+        "<": lo < v, "<=": lo <= v, ">": hi > v, ">=": hi >= v,
+        "==": lo <= v <= hi, "!=": not (lo == hi == v),
+    }[op]
+
+
+# --- Writing ---
+class DatasetWriter:
+    """Appends row batches; full chunks are flushed to disk as they fill up."""
+
+    def __init__(self, path: Path, columns: dict, chunk_rows: int, meta: dict):
+        self.path, self.chunk_rows = path, int(chunk_rows)
+        self.columns = {k: np.dtype(v).newbyteorder("<").str for k, v in columns.items()}
+        self.meta = meta
+        self.n_rows = 0
+        self.zones = {k: [] for k in self.columns}
+        self._pending = {k: [] for k in self.columns}
+        self._pending_rows = 0
+        self._files = {k: open(path / f"{k}.bin", "wb") for k in self.columns}
+
+    def append(self, batch: dict) -> None:
+        lengths = {len(np.asarray(batch[k])) for k in self.columns}
+        if len(lengths) != 1:
+            raise ValueError("All columns in a batch must have the same length.")
+        for k, dt in self.columns.items():
+            self._pending[k].append(np.asarray(batch[k], dtype=dt).ravel())
+        self._pending_rows += lengths.pop()
+        while self._pending_rows >= self.chunk_rows:
+            self._flush(self.chunk_rows)
+
+    def _flush(self, rows: int) -> None:
+        for k in self.columns:
+            data = np.concatenate(self._pending[k]) if len(self._pending[k]) > 1 else self._pending[k][0]
+            chunk, rest = data[:rows], data[rows:]
+            self._files[k].write(np.ascontiguousarray(chunk).tobytes())
+            finite = chunk[~np.isnan(chunk)] if chunk.dtype.kind == "f" else chunk
+            lo, hi = (float(finite.min()), float(finite.max())) if finite.size else (float("nan"),) * 2
+            self.zones[k].append([lo, hi])
+            self._pending[k] = [rest] if rest.size else []
+        self.n_rows += rows
+        self._pending_rows -= rows
+
+    def close(self) -> "Dataset":
+        if self._pending_rows:
+            self._flush(self._pending_rows)
+        for f in self._files.values():
+            f.close()
+        meta = {
+            **self.meta,
+            "columns": self.columns,
+            "n_rows": self.n_rows,
+            "chunk_rows": self.chunk_rows,
+            "zones": self.zones,
+        }
+        tmp = self.path / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta, indent=1), encoding="utf-8")
+        tmp.replace(self.path / "meta.json")
+        return Dataset(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            for f in self._files.values():
+                f.close()
+
+
+# --- Reading ---
+class Dataset:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / "meta.json").read_text(encoding="utf-8"))
+        self.n_rows = self.meta["n_rows"]
+        self.chunk_rows = self.meta["chunk_rows"]
+        self.n_chunks = -(-self.n_rows // self.chunk_rows) if self.n_rows else 0
+        self.last_scan = {}
+        self._maps = {}
+
+    @property
+    def columns(self) -> list:
+        return list(self.meta["columns"])
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only memory map over a whole column (nothing is loaded until sliced)."""
+        if name not in self._maps:
+            dt = np.dtype(self.meta["columns"][name])
+            if self.n_rows == 0:
+                self._maps[name] = np.empty(0, dtype=dt)
+            else:
+                self._maps[name] = np.memmap(self.path / f"{name}.bin", dtype=dt, mode="r", shape=(self.n_rows,))
+        return self._maps[name]
+
+    def candidate_chunks(self, terms: list) -> list:
+        zones = self.meta["zones"]
+        for col, _, _ in terms:
+            if col not in zones:
+                raise KeyError(f"Unknown column in predicate: {col}")
+        return [i for i in range(self.n_chunks)
+                if all(_chunk_may_match(*zones[col][i], op, v) for col, op, v in terms)]
+
+    def iter_query(self, where: str = None, columns=None):
+        """Yield ``{column: array}`` for the matching rows of each chunk that can match."""
+        terms = parse_predicate(where) if where else []
+        columns = list(columns or self.columns)
+        chunks = self.candidate_chunks(terms)
+        self.last_scan = {"chunks": self.n_chunks, "scanned": len(chunks)}
+        for i in chunks:
+            sl = slice(i * self.chunk_rows, min(self.n_rows, (i + 1) * self.chunk_rows))
+            mask = None
+            for col, op, v in terms:
+                x = self.column(col)[sl]
+                m = _OPS[op](x, v)
+                if x.dtype.kind == "f":
+                    m &= ~np.isnan(x)
+                mask = m if mask is None else mask & m
+            if mask is not None and not mask.any():
+                continue
+            yield {c: (np.asarray(self.column(c)[sl]) if mask is None else self.column(c)[sl][mask])
+                   for c in columns}
+
+    def query(self, where: str = None, columns=None, limit: int = None) -> pd.DataFrame:
+        """Matching rows as a DataFrame (stops reading once ``limit`` rows are found)."""
+        parts, n = [], 0
+        for part in self.iter_query(where, columns):
+            parts.append(pd.DataFrame(part))
+            n += len(parts[-1])
+            if limit is not None and n >= limit:
+                break
+        if not parts:
+            return pd.DataFrame({c: np.empty(0, dtype=self.meta["columns"][c]) for c in (columns or self.columns)})
+        df = pd.concat(parts, ignore_index=True)
+        return df.iloc[:limit] if limit is not None else df
+
+    def count(self, where: str = None) -> int:
+        if not where:
+            return self.n_rows
+        first = parse_predicate(where)[0][0]
+        return sum(len(p[first]) for p in self.iter_query(where, [first]))
+
+    def slice(self, start: int, stop: int, columns=None, step: int = 1) -> pd.DataFrame:
+        """Rows ``start:stop:step`` (use ``step`` to thin a huge result for charting)."""
+        return pd.DataFrame({c: np.asarray(self.column(c)[start:stop:step]) for c in (columns or self.columns)})
+
+
+# --- Store ---
+class ResultStore:
+    """Directory of named datasets."""
+
+    def __init__(self, root="results"):
+        self.root = Path(root)
+
+    def create(self, name: str, columns: dict, chunk_rows: int = 1 << 20, params: dict = None,
+               seed=None, model_version: str = None, **extra) -> DatasetWriter:
+        """
+        Start a dataset. ``columns`` maps names to dtypes (e.g. ``"f4"``);
+        ``params`` records the swept parameter ranges for later lookup.
+        """
+        path = self.root / name
+        if (path / "meta.json").exists():
+            raise FileExistsError(f"Dataset {name!r} already exists in {self.root}.")
+        path.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "name": name,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "params": params or {},
+            "seed": seed,
+            "model_version": model_version,
+            **extra,
+        }
+        return DatasetWriter(path, columns, chunk_rows, meta)
+
+    def open(self, name: str) -> Dataset:
+        return Dataset(self.root / name)
+
+    def list(self) -> list:
+        """Metadata (without zone maps) of every finished dataset."""
+        out = []
+        for meta_path in sorted(self.root.glob("*/meta.json")):
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            meta.pop("zones", None)
+            out.append(meta)
+        return out
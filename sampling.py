@@ -0,0 +1,95 @@
+# sampling.py
+"""
+Adaptive 1-D sampling for model curves and parameter sweeps.
+
+Starts from a coarse uniform grid and bisects only the intervals where the
+midpoint disagrees with straight-line interpolation by more than the
+tolerance, so plateaus stay coarse while corners (the 80/180 mmHg
+autoregulation breakpoints, the 40/80 mmHg Pgc clamp) and jumps are
+resolved down to ``min_width``. A final simplification pass drops points the
+chart would draw identically, which keeps Plotly payloads small.
+
+``f`` must be vectorized: it receives a 1-D array of x values and returns one
+array or a tuple of arrays (all outputs are refined together). Each round of
+refinement is a single call to ``f``.
+"""
+import numpy as np
+
+
+def _stack(y) -> np.ndarray:
+    """Outputs of ``f`` as a 2-D (n_outputs, n_points) float array."""
+    if isinstance(y, (tuple, list)):
+        return np.vstack([np.asarray(v, dtype=float) for v in y])
+    return np.atleast_2d(np.asarray(y, dtype=float))
+
+def _unstack(Y: np.ndarray, like):
+    return tuple(Y) if isinstance(like, (tuple, list)) else Y[0]
+
+
+def _simplify(x: np.ndarray, Y: np.ndarray, tol: np.ndarray) -> np.ndarray:
+    """Indices to keep so linear interpolation stays within ``tol`` (Ramer–Douglas–Peucker, vertical error)."""
+    keep = np.zeros(len(x), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(x) - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        inner = slice(a + 1, b)
+        w = (x[inner] - x[a]) / (x[b] - x[a])
+        err = np.abs(Y[:, inner] - (Y[:, [a]] + w * (Y[:, [b]] - Y[:, [a]]))) / tol[:, None]
+        worst = err.max(axis=0)
+        k = int(np.argmax(worst))
+        if worst[k] > 1.0:
+            keep[a + 1 + k] = True
+            stack += [(a, a + 1 + k), (a + 1 + k, b)]
+    return np.flatnonzero(keep)
+
+
+def adaptive_sample(f, lo: float, hi: float, rtol: float = 2e-3, atol: float = 0.0,
+                    initial: int = 9, min_width: float = None, max_points: int = 2000,
+                    simplify: bool = True):
+    """
+    Sample ``f`` on ``[lo, hi]``; returns ``(x, y)`` with ``y`` shaped like ``f``'s output.
+
+    An interval is accepted once ``|f(mid) − linear(mid)| ≤ atol + rtol·range``
+    for every output (``range`` = spread of that output over the samples).
+    ``min_width`` (default ``(hi − lo)/4096``) bounds the refinement at jumps.
+    """
+    lo, hi = float(lo), float(hi)
+    if hi <= lo:
+        x = np.array([lo])
+        raw = f(x)
+        return x, _unstack(_stack(raw), raw)
+    min_width = (hi - lo) / 4096 if min_width is None else float(min_width)
+
+    x = np.linspace(lo, hi, max(2, int(initial)))
+    raw = f(x)
+    Y = _stack(raw)
+    todo = np.ones(len(x) - 1, dtype=bool)        # intervals [x[i], x[i+1]] still to check
+
+    while todo.any() and len(x) < max_points:
+        left = np.flatnonzero(todo)
+        xm = 0.5 * (x[left] + x[left + 1])
+        Ym = _stack(f(xm))
+        tol = atol + rtol * np.maximum(np.ptp(np.hstack([Y, Ym]), axis=1), 1e-12)
+        err = np.abs(Ym - 0.5 * (Y[:, left] + Y[:, left + 1])) / tol[:, None]
+        split = (err.max(axis=0) > 1.0) & (x[left + 1] - x[left] > 2 * min_width)
+
+        # Insert every evaluated midpoint (refined or not) and mark the halves of split intervals.
+        x = np.concatenate([x, xm])
+        Y = np.hstack([Y, Ym])
+        order = np.argsort(x, kind="stable")
+        flags = np.concatenate([np.zeros(len(todo) + 1, dtype=bool), split])[order]
+        x, Y = x[order], Y[:, order]
+        # A new point at j with flag set → intervals (j-1, j) and (j, j+1) need checking.
+        todo = np.zeros(len(x) - 1, dtype=bool)
+        j = np.flatnonzero(flags)
+        todo[j - 1] = True
+        todo[j] = True
+
+    if simplify and len(x) > 2:
+        tol = atol + rtol * np.maximum(np.ptp(Y, axis=1), 1e-12)
+        idx = _simplify(x, Y, tol)
+        x, Y = x[idx], Y[:, idx]
+    return x, _unstack(Y, raw)
@@ -0,0 +1,155 @@
+# state_codec.py
+"""
+Compact, URL-safe encoding of page state.
+
+A page declares a schema (an ordered tuple of fields); ``encode`` bit-packs
+the state into the fewest bits each field needs and returns a base64url
+token without padding, e.g. the whole Parameter Simulator state fits in 7
+bytes (~10 characters). ``decode`` reverses it and raises ``ValueError`` for
+tokens that are corrupt or were made with a different schema, so pages can
+simply fall back to their defaults.
+
+Tokens live in ``st.query_params``: any server replica can rebuild the page
+from the URL alone, and the URL doubles as a shareable link.
+"""
+import base64
+import math
+import zlib
+from dataclasses import dataclass
+
+from model_spec import GFR_MODEL
+
+_VERSION = 1
+
+
+# --- Field types ---
+@dataclass(frozen=True)
+class Quantized:
+    """Float on a fixed grid ``lo, lo+step, …, hi`` (slider values round-trip exactly)."""
+    name: str
+    lo: float
+    hi: float
+    step: float
+
+    @property
+    def levels(self) -> int:
+        return int(round((self.hi - self.lo) / self.step)) + 1
+
+    def to_int(self, v) -> int:
+        i = int(round((float(v) - self.lo) / self.step))
+        return min(max(i, 0), self.levels - 1)
+
+    def from_int(self, i: int) -> float:
+        if i >= self.levels:
+            raise ValueError(f"{self.name}: grid index {i} out of range")
+        # Round away binary noise so 0.1-step values come back as typed.
+        digits = max(0, -math.floor(math.log10(self.step))) + 2
+        return round(self.lo + i * self.step, digits)
+
+
+@dataclass(frozen=True)
+class Choice:
+    """One value out of a fixed list of options."""
+    name: str
+    options: tuple
+
+    @property
+    def levels(self) -> int:
+        return len(self.options)
+
+    def to_int(self, v) -> int:
+        return self.options.index(v)
+
+    def from_int(self, i: int):
+        if i >= len(self.options):
+            raise ValueError(f"{self.name}: option index {i} out of range")
+        return self.options[i]
+
+
+@dataclass(frozen=True)
+class Flags:
+    """Any subset of a fixed list of options (one bit each), order preserved from ``options``."""
+    name: str
+    options: tuple
+
+    @property
+    def levels(self) -> int:
+        return 1 << len(self.options)
+
+    def to_int(self, v) -> int:
+        return sum(1 << i for i, o in enumerate(self.options) if o in set(v))
+
+    def from_int(self, i: int) -> list:
+        return [o for k, o in enumerate(self.options) if i >> k & 1]
+
+
+@dataclass(frozen=True)
+class Flag:
+    name: str
+    levels: int = 2
+
+    def to_int(self, v) -> int:
+        return int(bool(v))
+
+    def from_int(self, i: int) -> bool:
+        return bool(i)
+
+
+def _bits(field) -> int:
+    return max(1, (field.levels - 1).bit_length())
+
+def schema_tag(schema) -> int:
+    """One-byte checksum of a schema, stored in each token to reject stale links."""
+    return zlib.crc32(repr(tuple(schema)).encode("utf-8")) & 0xFF
+
+
+# --- Codec ---
+def encode(schema, state: dict) -> str:
+    """Pack ``state`` (missing keys are an error) into a base64url token."""
+    acc, nbits = 0, 0
+    for field in schema:
+        acc |= field.to_int(state[field.name]) << nbits
+        nbits += _bits(field)
+    payload = acc.to_bytes((nbits + 7) // 8, "little")
+    raw = bytes([_VERSION, schema_tag(schema)]) + payload
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode(schema, token: str) -> dict:
+    """Inverse of ``encode``; raises ``ValueError`` on any malformed or foreign token."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (ValueError, TypeError) as e:
+        raise ValueError("State token is not valid base64url.") from e
+    if len(raw) < 2 or raw[0] != _VERSION or raw[1] != schema_tag(schema):
+        raise ValueError("State token was made for a different page or version.")
+    nbits = sum(_bits(f) for f in schema)
+    if len(raw) - 2 != (nbits + 7) // 8:
+        raise ValueError("State token has the wrong length.")
+    acc = int.from_bytes(raw[2:], "little")
+    state = {}
+    for field in schema:
+        width = _bits(field)
+        state[field.name] = field.from_int(acc & ((1 << width) - 1))
+        acc >>= width
+    return state
+
+
+def quantize(schema, state: dict) -> dict:
+    """Snap ``state`` onto the schema's grid, i.e. what a token round-trip would give back."""
+    return {**state, **{f.name: f.from_int(f.to_int(state[f.name])) for f in schema}}
+
+
+def try_decode(schema, token):
+    """``decode`` that returns None instead of raising (for query-string input)."""
+    if not token:
+        return None
+    try:
+        return decode(schema, token)
+    except ValueError:
+        return None
+
+
+# --- Shared schemas ---
+# Slider ranges/steps of the model inputs, as declared in model_spec.
+PARAM_FIELDS = tuple(Quantized(p.name, float(p.lo), float(p.hi), float(p.step)) for p in GFR_MODEL.params)
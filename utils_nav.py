@@ -1,6 +1,9 @@
 # utils_nav.py  (replace with this)
 import streamlit as st
 import os
+import time
+
+import broadcast
 
 # 👉 Edit these paths to match your actual filenames
 PAGES = [
@@ -11,9 +14,83 @@ PAGES = [
     ("🧮 Parameter Simulator", "pages/02_🧮_Parameter_Simulator.py"),
     ("🧠 Autoregulation", "pages/03_🧠_Autoregulation.py"),
     ("⚡ Quick Scenarios", "pages/06_⚡_Quick_Scenarios.py"),
+    ("💊 Drug Time Course", "pages/07_💊_Drug_Time_Course.py"),
     ("📝 Cases & Worksheet", "pages/05_📝_Cases_and_Worksheet.py"),
    ]
 
+# Partial reruns: st.fragment (>=1.37), st.experimental_fragment (1.33–1.36), else a plain call.
+_FRAGMENT = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+def fragment(func=None, *, run_every=None):
+    """
+    Decorator: rerun only this function when its own widgets change (or every
+    ``run_every``). Page content outside it is drawn on full reruns only, so
+    pages keep headers, guides and notes out of their interactive panels.
+    """
+    if _FRAGMENT is None:
+        deco = lambda f: f
+    elif run_every is not None:
+        deco = _FRAGMENT(run_every=run_every)
+    else:
+        deco = _FRAGMENT
+    return deco(func) if func is not None else deco
+
+# --- Instructor broadcast (see broadcast.py) ---
+BROADCAST_POLL = "3s"
+
+def _instructor_pin():
+    try:
+        pin = st.secrets.get("instructor_pin")
+    except Exception:  # no secrets.toml
+        pin = None
+    return pin or os.environ.get("GFR_INSTRUCTOR_PIN")
+
+def follow_toggle() -> bool:
+    """Sidebar switch for students; True while the session follows the instructor."""
+    # The widget's key can't be written once it has rendered this run, so
+    # "Explore from here" leaves a flag that is applied before it renders.
+    if st.session_state.pop("_stop_following", False):
+        st.session_state["follow_broadcast"] = False
+    return st.sidebar.toggle("📡 Follow instructor", key="follow_broadcast",
+                             help="Show the scenario the instructor is broadcasting instead of your own controls.")
+
+def instructor_panel(default_name: str, params: dict):
+    """PIN-protected publish/stop controls (hidden unless a PIN is configured)."""
+    pin = _instructor_pin()
+    if not pin:
+        return
+    with st.expander("🎓 Instructor broadcast", expanded=False):
+        if st.text_input("Instructor PIN", type="password", key="instructor_pin") != pin:
+            st.caption("Enter the instructor PIN to broadcast this state to every student following along.")
+            return
+        name = st.text_input("Scenario name shown to students", default_name, key="broadcast_name")
+        b1, b2 = st.columns(2)
+        if b1.button("📡 Broadcast current parameters", use_container_width=True):
+            version = broadcast.publish(name, params)
+            st.success(f"Broadcasting “{name}” (update #{version}).")
+        if b2.button("⏹ Stop broadcast", use_container_width=True):
+            broadcast.stop()
+            st.info("Broadcast stopped.")
+
+@fragment(run_every=BROADCAST_POLL)
+def live_broadcast_panel(on_adopt=None):
+    """Polls the shared store and renders the instructor's precomputed outputs and figure."""
+    b = broadcast.latest()
+    if b is None:
+        st.info("📡 Waiting for the instructor to broadcast a scenario…")
+        return
+    st.markdown(f"### 📡 Live: {b.name}")
+    st.caption(f"Published {time.strftime('%H:%M:%S', time.localtime(b.published))} · update #{b.version}")
+    cols = st.columns(len(broadcast.METRICS))
+    for col, (k, unit) in zip(cols, broadcast.METRICS):
+        col.metric(f"{k} ({unit})", f"{b.outputs[k]:.1f}", f"{b.outputs[k] - b.baseline[k]:+.1f}")
+    st.plotly_chart(b.figure, use_container_width=True, key=f"broadcast_fig_{b.version}")
+    st.dataframe([b.params], use_container_width=True, hide_index=True)
+    if on_adopt is not None and st.button("✏️ Explore from here on my own"):
+        on_adopt(b.params)
+        st.session_state["_stop_following"] = True
+        st.rerun()  # full app rerun, not just this fragment: the page swaps back to its own controls
+
 def render_sidebar():
     # 🔒 Hide Streamlit's default "Pages" section
     st.markdown(
@@ -0,0 +1,265 @@
+# vascular.py
+"""
+Segmental renal vascular network: renal artery → afferent → glomerulus →
+efferent → peritubular capillaries → renal vein, with the kidney's nephrons
+as parallel units that may differ from one another.
+
+    MAP ─R_artery─ P_art ─┬─ Ra₁ ─ Pg₁ ─ Re₁ ─ Pp₁ ─ Rpt₁ ─┬─ P_vein
+                          ├─ Ra₂ ─ Pg₂ ─ Re₂ ─ Pp₂ ─ Rpt₂ ─┤
+                          └─ …        │Kf₂                  ┘
+                                      ▼ filtrate (Pbs + πgc)
+
+Pressures follow from nodal flow balance (Kirchhoff's current law), i.e. one
+sparse linear system per parameter set. Filtration is a leak of conductance
+Kf·(Pg − Pbs − πgc) out of each glomerular node, switched off for units whose
+net filtration pressure would be negative (a short active-set loop).
+
+Many parameter sets are solved at once as one block-diagonal system. Each
+block is ordered nephron nodes first, renal artery node last. That makes it
+an arrowhead matrix, so the LU factorization has no fill-in and thousands of
+nephron units per set stay interactive.
+
+Segment resistances are calibrated per parameter set against ``GFR_MODEL``:
+afferent, efferent and peritubular resistances are chosen so that a
+homogeneous network with an open artery reproduces the calibrated Pgc, RPF and
+GFR exactly. Nephron populations (per-unit ra/re/kf multipliers) and a renal
+artery stenosis then act on that calibrated kidney through the network itself.
+``python vascular.py`` checks the calibration and that populations matter.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import spsolve
+
+from model_spec import GFR_MODEL
+
+P_VEIN = 4.0                        # mmHg
+R_ARTERY = 2.0 / 650.0              # mmHg·min/mL: ~2 mmHg drop along a healthy renal artery
+EFFERENT_SHARE = 36.0 / 52.0        # of the post-glomerular pressure drop (36 efferent + 16 peritubular mmHg at baseline)
+MIN_DROP = 1.0                      # mmHg; floor where the calibrated model has Pgc ≥ P_art (very low MAP)
+MAX_FF = 0.95                       # efferent flow stays ≥ 5 % of RPF
+NEPHRONS = 2_000_000                # both kidneys, for single-nephron values
+STENOSIS_LENGTH = 0.1               # share of the renal artery's resistance in the narrowed segment
+
+
+@dataclass(frozen=True)
+class NephronGroup:
+    """A share of the nephron population with its own resistance/Kf multipliers."""
+    fraction: float
+    ra: float = 1.0
+    re: float = 1.0
+    kf: float = 1.0
+    label: str = ""
+
+
+HEALTHY = (NephronGroup(1.0, label="Healthy"),)
+
+# Mixed populations used on the Cases page
+POPULATIONS = {
+    "Healthy": HEALTHY,
+    "Early diabetic (hyperfiltering)": (NephronGroup(0.6, label="Normal"),
+                                         NephronGroup(0.4, ra=0.6, kf=1.3, label="Hyperfiltering")),
+    "CKD (30% sclerosed)": (NephronGroup(0.7, ra=0.85, kf=1.2, label="Remnant, adapted"),
+                            NephronGroup(0.3, ra=4.0, kf=0.0, label="Sclerosed")),
+}
+
+
+def nephron_population(n_units: int = 1000, groups=HEALTHY, cv: float = 0.0, seed: int = 0) -> dict:
+    """
+    Per-unit multipliers ``ra``, ``re``, ``kf`` (arrays of length ``n_units``)
+    and the ``group`` index of each unit. ``cv`` adds log-normal spread within groups.
+    """
+    share = np.array([g.fraction for g in groups], dtype=float)
+    counts = np.floor(share / share.sum() * n_units).astype(int)
+    counts[np.argmax(share)] += n_units - counts.sum()
+    group = np.repeat(np.arange(len(groups)), counts)
+    rng = np.random.default_rng(seed)
+    def spread():
+        if cv <= 0:
+            return np.ones(n_units)
+        s = np.sqrt(np.log1p(cv ** 2))
+        return rng.lognormal(-0.5 * s * s, s, n_units)
+    return {
+        "ra": np.array([g.ra for g in groups])[group] * spread(),
+        "re": np.array([g.re for g in groups])[group] * spread(),
+        "kf": np.array([g.kf for g in groups])[group] * spread(),
+        "group": group,
+    }
+
+
+def stenosis_factor(percent):
+    """
+    Renal artery resistance multiplier for a focal stenosis narrowing the
+    diameter by ``percent``: the stenotic segment scales as r⁻⁴ (Poiseuille).
+    """
+    open_ = 1.0 - np.clip(np.asarray(percent, dtype=float), 0.0, 99.0) / 100.0
+    return (1.0 - STENOSIS_LENGTH) + STENOSIS_LENGTH * open_ ** -4
+
+
+# --- Calibration ---
+def segment_resistances(p: dict):
+    """
+    Whole-kidney afferent, efferent and peritubular resistances (mmHg·min/mL)
+    that make a homogeneous, open-artery network reproduce ``GFR_MODEL`` at
+    ``p``, plus a mask of the sets where no floor was needed (exact match).
+    """
+    m = GFR_MODEL.batch(p)
+    rpf = np.maximum(m["RPF"], 1e-6)
+    gfr = np.minimum(m["GFR"], MAX_FF * rpf)
+    afferent_drop = p["MAP"] - R_ARTERY * rpf - m["Pgc"]
+    post_drop = m["Pgc"] - P_VEIN
+    exact = (afferent_drop >= MIN_DROP) & (post_drop >= MIN_DROP) & (m["GFR"] <= MAX_FF * rpf)
+    r_aff = np.maximum(afferent_drop, MIN_DROP) / rpf
+    r_post = np.maximum(post_drop, MIN_DROP) / (rpf - gfr)
+    return r_aff, EFFERENT_SHARE * r_post, (1.0 - EFFERENT_SHARE) * r_post, exact
+
+
+# --- Solver ---
+def _assemble(ga, ge, gp, kf, g_art, MAP, c, active):
+    """Block-diagonal system for B sets × N units; per block: [Pg₁…Pg_N, Pp₁…Pp_N, P_art]."""
+    B, N = ga.shape
+    m = 2 * N + 1
+    off = (np.arange(B) * m)[:, None]
+    g_idx = off + np.arange(N)                 # glomerular nodes
+    p_idx = g_idx + N                          # peritubular nodes
+    a_idx = off[:, 0] + 2 * N                  # renal artery node
+    a_col = np.broadcast_to(a_idx[:, None], (B, N))
+    leak = kf * active
+
+    rows = [g_idx, g_idx, g_idx, p_idx, p_idx, a_col, a_idx]
+    cols = [g_idx, a_col, p_idx, p_idx, g_idx, g_idx, a_idx]
+    vals = [ga + ge + leak, -ga, -ge, ge + gp, -ge, -ga, g_art + ga.sum(axis=1)]
+    A = sp.csc_matrix(
+        (np.concatenate([v.ravel() for v in vals]),
+         (np.concatenate([r.ravel() for r in rows]), np.concatenate([k.ravel() for k in cols]))),
+        shape=(B * m, B * m),
+    )
+    rhs = np.zeros(B * m)
+    rhs[g_idx.ravel()] = (leak * c[:, None]).ravel()
+    rhs[p_idx.ravel()] = (gp * P_VEIN).ravel()
+    rhs[a_idx] = g_art * MAP
+    return A, rhs
+
+
+def solve_network(params: dict, population: dict = None, stenosis=0.0, max_iter: int = 8) -> dict:
+    """
+    Pressures and flows for one or many parameter sets.
+
+    ``params`` holds the model inputs (MAP, Ra, Re, Pbs, Kf, pi_gc, Hct), each
+    a scalar or a length-B array; ``stenosis`` (% diameter) likewise. Returns
+    whole-kidney values shaped (B,) (``P_artery``, ``Pgc`` flow-weighted,
+    ``NFP``, ``GFR``, ``RPF``, ``RBF``, ``FF``) and per-unit arrays shaped (B, N)
+    (``unit_Pgc``, ``unit_GFR``, ``unit_RPF``).
+    """
+    p = {k: np.atleast_1d(np.asarray(params.get(k, GFR_MODEL.defaults[k]), dtype=float)) for k in GFR_MODEL.inputs}
+    sten = np.atleast_1d(np.asarray(stenosis, dtype=float))
+    B = max([len(v) for v in p.values()] + [len(sten)])
+    p = {k: np.broadcast_to(v, (B,)) for k, v in p.items()}
+    sten = np.broadcast_to(sten, (B,))
+    pop = population or nephron_population(1)
+    N = len(pop["ra"])
+
+    # Per-unit conductances: N parallel units share the whole-kidney segment.
+    r_aff, r_eff, r_pt, _ = segment_resistances(p)
+    ga = 1.0 / (N * r_aff[:, None] * pop["ra"][None, :])
+    ge = 1.0 / (N * r_eff[:, None] * pop["re"][None, :])
+    gp = np.broadcast_to(1.0 / (N * r_pt[:, None]), (B, N))
+    kf = p["Kf"][:, None] * pop["kf"][None, :] / N
+    g_art = 1.0 / (R_ARTERY * stenosis_factor(sten))
+    c = p["Pbs"] + p["pi_gc"]
+
+    m = 2 * N + 1
+    active = np.ones((B, N))
+    for _ in range(max_iter):
+        A, rhs = _assemble(ga, ge, gp, kf, g_art, p["MAP"], c, active)
+        x = spsolve(A, rhs, permc_spec="NATURAL").reshape(B, m)
+        Pg = x[:, :N]
+        now = (Pg > c[:, None]).astype(float)
+        if np.array_equal(now, active):
+            break
+        active = now
+
+    P_art = x[:, 2 * N]
+    unit_rpf = ga * (P_art[:, None] - Pg)
+    unit_gfr = kf * active * np.maximum(Pg - c[:, None], 0.0)
+    rpf = unit_rpf.sum(axis=1)
+    gfr = unit_gfr.sum(axis=1)
+    safe = np.where(rpf > 0, rpf, 1.0)
+    pgc = (unit_rpf * Pg).sum(axis=1) / safe
+    return {
+        "P_artery": P_art,
+        "Pgc": pgc,
+        "NFP": pgc - c,
+        "GFR": gfr,
+        "RPF": rpf,
+        "RBF": rpf / np.maximum(1e-6, 1.0 - p["Hct"] / 100.0),
+        "FF": np.where(rpf > 0, 100.0 * gfr / safe, 0.0),
+        "unit_Pgc": Pg,
+        "unit_GFR": unit_gfr,
+        "unit_RPF": unit_rpf,
+    }
+
+
+# --- Stenosis ---
+def stenosis_outputs(params: dict, stenosis=0.0, population: dict = None) -> dict:
+    """
+    ``solve_network`` output for a kidney behind a renal artery stenosis.
+
+    The pressure lost across the narrowing is that of the calibrated
+    (homogeneous) kidney's flow. The kidney, with its nephron ``population``,
+    then autoregulates the way the calibrated model does: its segments are
+    recalibrated for a perfusion pressure of MAP minus that loss. 0 % with a
+    homogeneous population is exactly ``GFR_MODEL``.
+    """
+    p = {k: np.asarray(params.get(k, GFR_MODEL.defaults[k]), dtype=float) for k in GFR_MODEL.inputs}
+    open_ = solve_network(p, None, 0.0)["P_artery"]
+    narrowed = solve_network(p, None, stenosis)["P_artery"]
+    out = solve_network({**p, "MAP": p["MAP"] - (open_ - narrowed)}, population, 0.0)
+    out["P_artery"] = narrowed
+    return out
+
+
+def stenosis_case(params: dict, stenosis: float = 0.0, population: dict = None) -> dict:
+    """Scalar whole-kidney ``stenosis_outputs``: the keys of ``physiology.compute_outputs`` plus ``P_artery``."""
+    out = stenosis_outputs(params, stenosis, population)
+    return {k: float(out[k][0]) for k in ("GFR", "RPF", "RBF", "FF", "Pgc", "NFP", "P_artery")}
+
+
+def single_nephron_gfr(out: dict) -> np.ndarray:
+    """Per-unit GFR of a ``solve_network`` result as single-nephron GFR (nL/min), shaped (B, N)."""
+    return out["unit_GFR"] * out["unit_GFR"].shape[1] * 1e6 / NEPHRONS
+
+
+# --- Self-check (python vascular.py) ---
+def baseline_mismatch(n: int = 500, seed: int = 0) -> float:
+    """
+    Largest |homogeneous network at 0 % − GFR_MODEL| over ``n`` random
+    parameter sets in the model's slider ranges (where no floor applies).
+    """
+    rng = np.random.default_rng(seed)
+    params = {q.name: rng.uniform(q.lo, q.hi, n) for q in GFR_MODEL.params}
+    exact = segment_resistances(params)[3]
+    ref = GFR_MODEL.batch(params)
+    out = stenosis_outputs(params, 0.0)
+    return max(float(np.max(np.abs(out[k] - ref[k])[exact])) for k in ref)
+
+
+def population_gfr(params: dict = None, n_units: int = 500, cv: float = 0.0, stenosis: float = 0.0) -> dict:
+    """Whole-kidney GFR of each ``POPULATIONS`` entry for one parameter set."""
+    return {name: stenosis_case(params or {}, stenosis, nephron_population(n_units, groups, cv=cv))["GFR"]
+            for name, groups in POPULATIONS.items()}
+
+
+if __name__ == "__main__":
+    err = baseline_mismatch()
+    print(f"homogeneous network at 0 % vs calibrated model: max abs difference {err:.2e}")
+    case = {"MAP": 95.0, "Ra": 1.2, "Re": 1.8}
+    for s in (0.0, 80.0):
+        gfr = population_gfr(case, stenosis=s)
+        print(f"GFR at {s:.0f} % stenosis: " + ", ".join(f"{k} {v:.1f}" for k, v in gfr.items()))
+    spread = max(gfr.values()) - min(gfr.values())
+    if err > 1e-6:
+        raise SystemExit("network does not reproduce the calibrated model at 0 %")
+    if spread < 5.0:
+        raise SystemExit("nephron populations barely change GFR")